@@ -1,13 +1,29 @@
-import datetime
 import hashlib
 import json
-import pickle
 import re
 from collections import Counter
 
 import numpy as np
 import pandas as pd
-import requests
+
+from instrumentation import Stats, profile
+from lookup_store import load_or_convert
+from score_matrix import (
+    NUM_PATTERNS,
+    counter_to_vector,
+    decode_scores,
+    drop_solved_lines,
+    encode_digits,
+    summarize_scores,
+)
+from verify import HashVerifier, NYTVerifier
+
+SCORE_TRANSLATION = str.maketrans({'🟩': '2', '🟨': '1', '⬛': '0', '⬜': '0'})
+SCORE_LINE = re.compile('([012]{5})')
+# the translation is one character for one character, so matching the untranslated alphabet finds the same lines
+RAW_SCORE_LINE = re.compile('[012🟩🟨⬛⬜]{5}')
+SCORE_CHARS = np.array(sorted(map(ord, '012🟩🟨⬛⬜')), dtype=np.uint32)
+SCORE_CHAR_DIGITS = np.array([int(chr(x).translate(SCORE_TRANSLATION)) for x in SCORE_CHARS])
 
 
 def help_hash(x):
@@ -31,34 +47,151 @@ def check_match(y):
     return False
 
 
+def filter_tweets(tweet_text, wordle_id):
+    """check_match for whole columns at once, returns a boolean array."""
+    tweet_text = pd.Series(tweet_text).reset_index(drop=True)
+    wordle_id = np.asarray(wordle_id)
+    keep = (
+        tweet_text.str.count('wordle', flags=re.IGNORECASE).eq(1)
+        & ~tweet_text.str.lower().str.contains('https', regex=False)
+    ).to_numpy(dtype=bool, copy=True)
+    # the 'Wordle {n}' search only differs by wordle number, so group the rows once and run it per group
+    wordle_nums, group = np.unique(wordle_id, return_inverse=True)
+    order = np.argsort(group, kind='stable')
+    bounds = np.searchsorted(group[order], np.arange(len(wordle_nums) + 1))
+    for wordle_num, start, stop in zip(wordle_nums, bounds[:-1], bounds[1:]):
+        rows = order[start:stop]
+        rows = rows[keep[rows]]
+        keep[rows] = tweet_text.iloc[rows].str.contains(f'Wordle {wordle_num}').to_numpy(dtype=bool)
+    return keep
+
+
+def parse_score_lines(tweet_text):
+    """wordle_guesses for a whole column at once, as base 3 pattern codes.
+
+    Returns (codes, offsets), the score lines of tweet i are codes[offsets[i]:offsets[i + 1]].
+    """
+    score_lists = [RAW_SCORE_LINE.findall(x) for x in pd.Series(tweet_text).tolist()]
+    offsets = np.zeros(len(score_lists) + 1, dtype=np.int64)
+    np.cumsum([len(x) for x in score_lists], out=offsets[1:])
+    chars = np.frombuffer(''.join(flatten_list(score_lists)).encode('utf-32-le'), dtype=np.uint32)
+    codes = encode_digits(SCORE_CHAR_DIGITS[np.searchsorted(SCORE_CHARS, chars)])
+    return codes, offsets
+
+
+def gather_codes(codes, offsets, rows):
+    """Pull the score line codes of some tweet rows out of (codes, offsets) storage, returned the same way."""
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = offsets[rows]
+    new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(offsets[rows + 1] - starts, out=new_offsets[1:])
+    index = np.repeat(starts - new_offsets[:-1], np.diff(new_offsets)) + np.arange(new_offsets[-1])
+    return codes[index], new_offsets
+
+
+def compact_offsets(offsets):
+    """int32 offsets unless there are too many score lines for them"""
+    offsets = np.asarray(offsets)
+    return offsets.astype(np.int32) if offsets[-1] < np.iinfo(np.int32).max else offsets.astype(np.int64)
+
+
+def count_by_wordle(wordle_id, codes, offsets):
+    """Tweet and pattern counts per wordle: (wordle_ids, tweet counts, (len(wordle_ids), 243) pattern counts)"""
+    wordle_ids, group = np.unique(np.asarray(wordle_id), return_inverse=True)
+    code_group = np.repeat(group, np.diff(offsets))
+    counts = np.bincount(
+        code_group * NUM_PATTERNS + codes, minlength=len(wordle_ids) * NUM_PATTERNS
+    ).reshape(-1, NUM_PATTERNS)
+    return wordle_ids, np.bincount(group, minlength=len(wordle_ids)), counts
+
+
 class TwitterWordle:
-    last_figure = None
+    _figure_args = None
+    _last_figure = None
+    last_result = None
 
-    def __init__(self, tweet_df=None, use_limited_targets=True):
-        if use_limited_targets:
-            self.zipped_counters = json.load(open('zipped_counters_nyt_2022_02_15.json', 'r'))
-        else:
-            self.zipped_counters = pickle.load(
-                open('zipped_counters_allwords_nyt.pickle', 'rb')
-            )
+    def __init__(
+        self, tweet_df=None, use_limited_targets=True, verifier=None, offline=False, stats=None
+    ):
+        # per stage timings, see instrumentation.py. Pass stats=Stats() to record them
+        self.stats = stats if stats is not None else Stats(enabled=False)
+        with self.stats.stage('load_lookup'):
+            if use_limited_targets:
+                self.score_matrix = load_or_convert('zipped_counters_nyt_2022_02_15.json')
+            else:
+                self.score_matrix = load_or_convert('zipped_counters_allwords_nyt.pickle')
         self.output = []
-        self.zipped_counters = {key: val for key, val in self.zipped_counters}
-        print(f'Loaded {len(self.zipped_counters)} pre-computed lookup dictionaries.')
+        self._zipped_counters = None
+        print(f'Loaded {len(self.score_matrix)} pre-computed lookup dictionaries.')
         if tweet_df is not None:
             assert isinstance(tweet_df, pd.DataFrame), 'Must be a dataframe'
         self.tweet_df = tweet_df
+        self.wordle_index = {}
+        self.wordle_counts = {}
+        self.wordle_tweet_counts = {}
         if self.tweet_df is not None:
-            self.tweet_df = self.tweet_df.loc[
-                tweet_df.loc[:, ['tweet_text', 'wordle_id']].apply(check_match, axis=1)
-            ]
-            self.tweet_df['score_list'] = self.tweet_df['tweet_text'].apply(
-                self.wordle_guesses
+            with self.stats.stage('filter', items=len(tweet_df)):
+                self.tweet_df = self.tweet_df.loc[
+                    filter_tweets(tweet_df['tweet_text'], tweet_df['wordle_id'])
+                ].copy()
+            with self.stats.stage('parse', items=len(self.tweet_df)):
+                codes, offsets = parse_score_lines(self.tweet_df['tweet_text'])
+                keep = np.diff(offsets) <= 6
+            self.set_parsed_tweets(
+                self.tweet_df.loc[keep].copy(), *gather_codes(codes, offsets, np.flatnonzero(keep))
             )
-            self.tweet_df = self.tweet_df.loc[
-                self.tweet_df.loc[:, 'score_list'].apply(lambda x: len(x) <= 6)
-            ]
         with open('hashed_lookup2.json', 'r') as data_file:
             self.solution_dict = json.load(data_file)
+        if verifier is None:
+            hash_verifier = HashVerifier(self.solution_dict)
+            verifier = hash_verifier if offline else NYTVerifier(fallback=hash_verifier)
+        self.verifier = verifier
+
+    @classmethod
+    def from_pattern_counts(cls, wordle_counts, wordle_tweet_counts=None, **kwargs):
+        """Solve from per wordle pattern count vectors, e.g. from ingest.ingest_tweets, instead of a dataframe."""
+        t = cls(**kwargs)
+        t.wordle_counts = {key: np.asarray(val) for key, val in wordle_counts.items()}
+        t.wordle_tweet_counts = dict(wordle_tweet_counts or {})
+        return t
+
+    @classmethod
+    def from_tweet_store(cls, path='tweet_store', wordle_nums=None, columns=('tweet_text',), **kwargs):
+        """Load already filtered and parsed tweets from a tweet_store.py dataset, only reading the partitions of
+        wordle_nums (all if None) and the given columns."""
+        from tweet_store import read_codes
+
+        t = cls(**kwargs)
+        t.set_parsed_tweets(*read_codes(path, wordle_nums=wordle_nums, columns=columns))
+        return t
+
+    def set_parsed_tweets(self, tweet_df, codes, offsets):
+        """Use tweets that already passed the filters, with their score lines as (codes, offsets) storage.
+
+        Tweet i of tweet_df has the score line codes codes[offsets[i]:offsets[i + 1]], one uint8 per line
+        instead of a list of strings per row. build_wordle_index keeps them in wordle order, tweet_scores turns
+        rows back into lists of strings.
+        """
+        self.tweet_df = tweet_df
+        with self.stats.stage('count', items=len(tweet_df)):
+            self.build_wordle_index(codes, offsets)
+
+    def tweet_scores(self, rows):
+        """score lines of some tweet rows (positions in tweet_df) as lists of strings, like the old score_list"""
+        # position of each tweet_df row in the wordle ordered storage
+        stored = np.empty_like(self._wordle_rows)
+        stored[self._wordle_rows] = np.arange(len(stored))
+        rows = stored[np.asarray(rows, dtype=np.int64)]
+        codes, offsets = gather_codes(self.score_codes, self.score_offsets, rows)
+        scores = decode_scores(codes)
+        return [scores[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])]
+
+    @property
+    def zipped_counters(self):
+        """The lookup dictionaries as {target_word: {score_line: weight}}, only built if something asks for them"""
+        if self._zipped_counters is None:
+            self._zipped_counters = self.score_matrix.to_dict()
+        return self._zipped_counters
 
     def print_store(self, s, **kwargs):
         self.output.append(s)
@@ -97,68 +230,221 @@ class TwitterWordle:
             ]
         )
 
-    def extract_all_guesses(self, wordle_num, downsample=None, verbose=True):
-        """for the dataframe, extract the guesses for wordle_num into a single list"""
+    def build_wordle_index(self, codes, offsets):
+        """Group the tweets by wordle_id once, so per wordle lookups never scan self.tweet_df.
+
+        The tweets' (codes, offsets) are reordered once into wordle order and kept as score_codes and
+        score_offsets, so a day's codes are one contiguous slice. Stored tweet k is row _wordle_rows[k] of
+        tweet_df. wordle_index maps wordle_id to a (start, stop) slice of the stored tweets, and wordle_counts
+        holds each day's pattern count vector.
+        """
+        ids = self.tweet_df['wordle_id'].to_numpy()
+        self._wordle_rows = np.argsort(ids, kind='stable')
+        wordle_ids, starts = np.unique(ids[self._wordle_rows], return_index=True)
+        bounds = np.append(starts, len(ids))
+        self.wordle_index = {
+            wordle_id: (start, stop)
+            for wordle_id, start, stop in zip(wordle_ids.tolist(), bounds[:-1], bounds[1:])
+        }
+        codes, offsets = gather_codes(np.asarray(codes, dtype=np.uint8), offsets, self._wordle_rows)
+        self.score_codes, self.score_offsets = codes, compact_offsets(offsets)
+        wordle_ids, tweet_counts, counts = count_by_wordle(
+            ids[self._wordle_rows], self.score_codes, self.score_offsets
+        )
+        self.wordle_counts = dict(zip(wordle_ids.tolist(), counts))
+        self.wordle_tweet_counts = dict(zip(wordle_ids.tolist(), tweet_counts.tolist()))
+
+    def tweet_count(self, wordle_num):
+        return self.wordle_tweet_counts.get(wordle_num, 0)
+
+    def wordle_codes(self, wordle_num, downsample=None):
+        """array of every score line code tweeted for wordle_num, optionally from a sample of downsample tweets"""
+        start, stop = self.wordle_index.get(wordle_num, (0, 0))
         if not downsample:
-            if verbose:
-                self.print_store(
-                    f"TwitterWordle analyzed {len(self.tweet_df.query(f'wordle_id == {wordle_num}'))} tweets for Wordle {wordle_num}.\n"
-                )
-            return flatten_list(
-                self.tweet_df.query(f'wordle_id == {wordle_num}')['score_list'].tolist()
+            return self.score_codes[self.score_offsets[start] : self.score_offsets[stop]]
+        # same rows DataFrame.sample picks from the wordle's tweets
+        rows = pd.Series(np.arange(start, stop)).sample(downsample, random_state=42)
+        return gather_codes(self.score_codes, self.score_offsets, rows.to_numpy())[0]
+
+    def pattern_counts(self, wordle_num, downsample=None, verbose=True):
+        """vector of how often each score pattern code was tweeted for wordle_num"""
+        if downsample:
+            assert self.tweet_df is not None, 'Downsampling needs the tweets, not just pattern counts'
+            return np.bincount(self.wordle_codes(wordle_num, downsample), minlength=NUM_PATTERNS)
+        if verbose:
+            self.print_store(
+                f'TwitterWordle analyzed {self.tweet_count(wordle_num)} tweets for Wordle {wordle_num}.\n'
             )
+        return self.wordle_counts.get(wordle_num, np.zeros(NUM_PATTERNS, dtype=np.int64))
 
-        return flatten_list(
-            self.tweet_df.query(f'wordle_id == {wordle_num}')
-            .sample(downsample, random_state=42)['score_list']
-            .tolist()
-        )
+    def extract_all_guesses(self, wordle_num, downsample=None, verbose=True):
+        """for the dataframe, extract the guesses for wordle_num into a single list"""
+        if not downsample and verbose:
+            self.print_store(
+                f'TwitterWordle analyzed {self.tweet_count(wordle_num)} tweets for Wordle {wordle_num}.\n'
+            )
+        return decode_scores(self.wordle_codes(wordle_num, downsample))
 
     @staticmethod
     def wordle_guesses(tweet):
-        text = (
-            tweet.replace('🟩', '2').replace('🟨', '1').replace('⬛', '0').replace('⬜', '0')
-        )
-        guesses = re.findall('([012]{5})', text)
-        return guesses
+        return SCORE_LINE.findall(tweet.translate(SCORE_TRANSLATION))
 
     def solve_guess_list(
         self, all_guesses, min_count=None, verbose=True, exclude_misses=False, **kwargs
     ):
         """take a list of all tweeted guesses and return the result, the sigma, and the Series."""
+        prediction, sigma, res, delta, _ = self.solve_counts(
+            counter_to_vector(Counter(all_guesses)),
+            min_count=min_count,
+            verbose=verbose,
+            exclude_misses=exclude_misses,
+            **kwargs,
+        )
         if not exclude_misses:
             the_guesses = [x for x in all_guesses if x != '22222']
         else:
-            self.print_store('Excluding misses')
             the_guesses = [x for x in all_guesses if x not in ('22222', '00000')]
+        return prediction, sigma, res, delta, the_guesses
 
-        c = Counter(the_guesses)
+    def solve_counts(self, counts, min_count=None, verbose=True, exclude_misses=False, **kwargs):
+        """solve_guess_list from a vector of how often each score pattern code was tweeted.
+
+        Returns the result, the sigma, the Series, the delta above the runner up and the counts that were used.
+        """
+        if exclude_misses and verbose:
+            self.print_store('Excluding misses')
+        counts = drop_solved_lines(counts, exclude_misses)
         if not min_count:
-            min_count = np.floor(np.quantile(list(c.values()), 0.25))
+            min_count = np.floor(np.quantile(counts[counts > 0], 0.25))
         if verbose:
             self.print_store(
-                f'{len(the_guesses)} score patterns. {len(set(the_guesses))} unique.\n'
+                f'{counts.sum()} score patterns. {np.count_nonzero(counts)} unique.\n'
             )
 
-        res = []
-        for key, val in self.zipped_counters.items():
-            res.append(
-                {
-                    'sum': self.process_counter(val, c, min_count=min_count, **kwargs),
-                    'word': key,
-                }
-            )
-        res = pd.DataFrame(res).set_index('word').sort_values('sum')['sum']
-        # self.print_store(res.describe())
-        res = (res / res.mean()) - 1
+        sums = self.score_matrix.score(counts, min_count=min_count, **kwargs)
+        res, leader, sigma, delta = summarize_scores(sums)
         return (
-            res.index[-1],
-            res.max() / res.std(),
-            res,
-            (res.iloc[-1] / res.iloc[-2]),
-            the_guesses,
+            str(self.score_matrix.words[leader]),
+            sigma,
+            self.score_series(res),
+            delta,
+            counts,
         )
 
+    def score_series(self, res):
+        """normalized scores as the sorted Series solve_guess_list returns"""
+        return pd.Series(
+            res, index=pd.Index(self.score_matrix.words, name='word'), name='sum'
+        ).sort_values()
+
+    def grid_search(self, counts, min_counts, penalty_terms, exclude_misses=False, threshold=1.13):
+        """solve_counts for every (min_count, penalty_term) combination in one batched array computation.
+
+        Returns a dict with the full result surface, 'predictions', 'sigmas' and 'deltas' shaped
+        (len(min_counts), len(penalty_terms)) and the normalized 'scores' of every target, plus the chosen
+        'min_count', 'penalty_term', 'prediction', 'sigma', 'delta' and 'data' Series.
+
+        The chosen cell is the one the old nested loop stopped on: the first combination, min_count outer and
+        penalty inner, with a delta above threshold. If none gets there the best delta is used, unless the last
+        combination was already within 1.1.
+        """
+        counts = drop_solved_lines(counts, exclude_misses)
+        sums = self.score_matrix.grid_scores(counts, min_counts, penalty_terms)
+        scores, leaders, sigmas, deltas = summarize_scores(sums)
+
+        flat_deltas = deltas.ravel()
+        above = np.flatnonzero(flat_deltas > threshold)
+        if len(above):
+            chosen = above[0]
+        elif flat_deltas[-1] < 1.1:
+            # last of the maximum deltas, like sorting the iterated results by delta
+            chosen = len(flat_deltas) - 1 - np.argmax(flat_deltas[::-1])
+        else:
+            chosen = len(flat_deltas) - 1
+        m, p = np.unravel_index(chosen, deltas.shape)
+        return {
+            'min_counts': np.asarray(min_counts),
+            'penalty_terms': np.asarray(penalty_terms),
+            'predictions': self.score_matrix.words[leaders],
+            'sigmas': sigmas,
+            'deltas': deltas,
+            'scores': scores,
+            'min_count': min_counts[m],
+            'penalty_term': penalty_terms[p],
+            'prediction': str(self.score_matrix.words[leaders[m, p]]),
+            'sigma': sigmas[m, p],
+            'delta': deltas[m, p],
+            'data': self.score_series(scores[m, p]),
+            'counts': counts,
+        }
+
+    def downsample_sweep(
+        self,
+        wordle_num,
+        sample_sizes,
+        n_replicates=1000,
+        answer=None,
+        min_count=3,
+        penalty_term=-5e7,
+        exclude_misses=False,
+        seed=0,
+    ):
+        """How a solve holds up with fewer tweets, from multinomial resamples of the day's pattern counts.
+
+        A sample size is a number of tweets, drawn as that many tweets' worth of score lines at the day's mean lines
+        per tweet. All n_replicates of a size are scored in one batched matrix product. Accuracy is against answer,
+        or against the prediction from every tweet of the day if answer is None. min_count=None uses the quartile
+        rule of solve_counts in each replicate.
+
+        Returns a DataFrame with one row per sample size: accuracy, the share of replicates with no pattern at
+        min_count, the 5%, 50% and 95% delta above the runner up (the margin) and the median sigma.
+        """
+        counts = self.wordle_counts.get(wordle_num)
+        assert counts is not None and counts.sum(), f'No score lines for Wordle {wordle_num}'
+        if answer is None:
+            answer = self.solve_counts(
+                counts,
+                min_count=min_count,
+                verbose=False,
+                exclude_misses=exclude_misses,
+                penalty_term=penalty_term,
+            )[0]
+        answer_index = self.score_matrix.word_index[answer]
+        lines_per_tweet = counts.sum() / max(self.tweet_count(wordle_num), 1)
+        p = counts / counts.sum()
+        rng = np.random.default_rng(seed)
+
+        out = []
+        for sample_size in sample_sizes:
+            n_lines = max(int(round(sample_size * lines_per_tweet)), 1)
+            samples = drop_solved_lines(rng.multinomial(n_lines, p, size=n_replicates), exclude_misses)
+            the_min_count = min_count
+            if not the_min_count:
+                seen = np.where(samples > 0, samples, np.nan)
+                with np.errstate(all='ignore'):
+                    the_min_count = np.nan_to_num(np.floor(np.nanquantile(seen, 0.25, axis=1)))
+            sums = self.score_matrix.batch_scores(
+                samples, min_count=the_min_count, penalty_term=penalty_term
+            )
+            with np.errstate(all='ignore'):
+                # a replicate with no pattern at min_count scores every target 0 and has no leader
+                _, leaders, sigmas, deltas = summarize_scores(sums)
+                no_signal = ~np.isfinite(deltas)
+                out.append(
+                    {
+                        'sample_size': sample_size,
+                        'lines': n_lines,
+                        'replicates': n_replicates,
+                        'accuracy': np.mean((leaders == answer_index) & ~no_signal),
+                        'no_signal': np.mean(no_signal),
+                        'delta_p05': np.nanquantile(deltas, 0.05),
+                        'delta_median': np.nanmedian(deltas),
+                        'delta_p95': np.nanquantile(deltas, 0.95),
+                        'sigma_median': np.nanmedian(sigmas),
+                    }
+                )
+        return pd.DataFrame(out)
+
     def solve(
         self,
         wordle_num=None,
@@ -170,69 +456,97 @@ class TwitterWordle:
         exclude_misses=False,
         return_full_plot=False,
         mask_result=True,
+        headless=False,
         **kwargs,
     ):
-        """Can extract a tweet from self.tweet_df or process a list of tweets"""
+        """Can extract a tweet from self.tweet_df or process a list of tweets
+
+        headless prints nothing, skips the plot data and returns a dict of the prediction (None when
+        masked), its hash, sigma, delta, impossible pattern count, the parameters used and the verification. The
+        figure is built lazily either way, when plot is set or last_figure is read.
+        """
 
         assert wordle_num or tweet_list, 'Must provide either a wordle_num or a list of tweets'
         self.output = []
+        self.stats.count('solve')
+        # headless keeps stdout quiet, the record it returns has everything
+        verbose = not headless
         if wordle_num:
             assert (
-                self.tweet_df is not None
-            ), 'Class must be instantiated with a dataframe to solve from a wordle number'
-            score_guess_list = self.extract_all_guesses(wordle_num, downsample=downsample)
+                self.wordle_counts
+            ), 'Class must be instantiated with a dataframe or pattern counts to solve from a wordle number'
+            with self.stats.stage('pattern_counts', items=self.tweet_count(wordle_num)):
+                counts = self.pattern_counts(wordle_num, downsample=downsample, verbose=verbose)
         elif tweet_list:
-            self.print_store(f'{len(tweet_list)} tweets')
-            score_guess_list = flatten_list(
-                [self.wordle_guesses(x[0]) for x in [x for x in tweet_list if check_match(x)]]
-            )
+            if verbose:
+                self.print_store(f'{len(tweet_list)} tweets')
+            with self.stats.stage('solve_parse', items=len(tweet_list)):
+                tweet_text, wordle_ids = zip(*tweet_list)
+                codes, _ = parse_score_lines(
+                    pd.Series(tweet_text)[filter_tweets(list(tweet_text), wordle_ids)]
+                )
+                counts = np.bincount(codes, minlength=NUM_PATTERNS)
             wordle_num = int(tweet_list[0][1].replace(',', ''))
-        # print(score_guess_list)
 
-        prediction, sigma, data, delta_above_two, the_guesses = self.solve_guess_list(
-            score_guess_list, min_count=min_count, exclude_misses=exclude_misses, **kwargs
-        )
-        iterated_results = []
+        with self.stats.stage('score', items=len(self.score_matrix)):
+            prediction, sigma, data, delta_above_two, used_counts = self.solve_counts(
+                counts, min_count=min_count, verbose=verbose, exclude_misses=exclude_misses, **kwargs
+            )
+        grid = None
         if delta_above_two < 1.13 and iterate_low_score:
-            print(
-                f'Wordle {wordle_num} initial signal low {delta_above_two:1.3}. Iterating for better parameters'
+            if verbose:
+                print(
+                    f'Wordle {wordle_num} initial signal low {delta_above_two:1.3}. '
+                    'Iterating for better parameters'
+                )
+            min_counts = list(range(max(min_count - 2, 1), min_count + 10, 2))
+            penalty_terms = [p * 1e7 for p in range(-7, -100, -2)]
+            with self.stats.stage('grid_search', items=len(min_counts) * len(penalty_terms)):
+                grid = self.grid_search(counts, min_counts, penalty_terms)
+            prediction = grid['prediction']
+            sigma = grid['sigma']
+            data = grid['data']
+            delta_above_two = grid['delta']
+            used_counts = grid['counts']
+            if verbose:
+                print(
+                    f'Iterated to a better signal with min_count {grid["min_count"]} and penalty '
+                    f'{grid["penalty_term"]:.2E}'
+                )
+        prediction_possible = self.score_matrix.possible[self.score_matrix.word_index[prediction]]
+        seen = used_counts > 0
+        numerator = seen.sum()
+        denom = prediction_possible.sum()
+        impossible_count = (seen & ~prediction_possible).sum()
+        if verbose:
+            self.print_store(
+                f'{(numerator-impossible_count) / denom:.2%}, ({numerator-impossible_count}/{denom}) valid final guess patterns found. Impossible pattern count: {impossible_count}.\n'
             )
 
-            for my_min_count in range(max(min_count - 2, 1), min_count + 10, 2):
-                if delta_above_two > 1.13:
-                    continue
-
-                for p in range(-7, -100, -2):
-                    print('.', end='')
-
-                    penalty_term = p * 1e7
-                    if delta_above_two > 1.13:
-                        continue
-                    prediction, sigma, data, delta_above_two, the_guesses = (
-                        self.solve_guess_list(
-                            score_guess_list,
-                            min_count=my_min_count,
-                            penalty_term=penalty_term,
-                            verbose=False,
-                        )
-                    )
-                    final_min_count = my_min_count
-                    final_penalty_term = penalty_term
-                    iterated_results.append((prediction, sigma, data, delta_above_two))
-            print(
-                f'\nIterated to a better signal with min_count {final_min_count} and penalty {final_penalty_term:.2E}'
-            )
-        if delta_above_two < 1.1 and iterate_low_score:
-            prediction, sigma, data, delta_above_two = sorted(
-                iterated_results, key=lambda x: x[3]
-            )[-1]
-        prediction_dict = self.zipped_counters.get(prediction)
-        numerator = len(set(the_guesses))
-        denom = len(prediction_dict)
-        impossible_count = len(set(the_guesses).difference(set(prediction_dict.keys())))
-        self.print_store(
-            f'{(numerator-impossible_count) / denom:.2%}, ({numerator-impossible_count}/{denom}) valid final guess patterns found. Impossible pattern count: {impossible_count}.\n'
-        )
+        # the figure is only built when plot is set or last_figure is read
+        self._figure_args = (return_full_plot, data, mask_result)
+        self._last_figure = None
+        if headless:
+            with self.stats.stage('verify'):
+                correct, source = self.verifier.verify(wordle_num, prediction)
+            self.last_result = {
+                'wordle_num': wordle_num,
+                'prediction': None if mask_result else prediction,
+                'hash': help_hash(prediction),
+                'sigma': float(sigma),
+                'delta': float(delta_above_two),
+                'impossible_count': int(impossible_count),
+                'valid_patterns': int(numerator - impossible_count),
+                'possible_patterns': int(denom),
+                'min_count': grid['min_count'] if grid else min_count,
+                'penalty_term': grid['penalty_term'] if grid else kwargs.get('penalty_term', -5e7),
+                'iterated': grid is not None,
+                'exclude_misses': exclude_misses,
+                'downsample': downsample,
+                'correct': correct,
+                'source': source,
+            }
+            return self.last_result
 
         plot_data = data.sort_values().tail(20)
         self.plot_data = plot_data
@@ -241,7 +555,6 @@ class TwitterWordle:
             self.print_store(
                 f'{sigma:.2} STD above mean. {delta_above_two:.3} above runner up.\n'
             )
-            fig = self.make_figure(return_full_plot, data)
             return_val = prediction
         else:
             self.print_store(
@@ -249,59 +562,79 @@ class TwitterWordle:
             )
 
             plot_data.index = [help_hash(x)[:7] for x in plot_data.index]
-            fig = self.make_figure(return_full_plot, plot_data)
             return_val = help_hash(prediction)
-        date = (datetime.datetime(2021, 6, 19) + datetime.timedelta(days=wordle_num)).strftime(
-            '%Y-%m-%d'
-        )
-        url = f'https://www.nytimes.com/svc/wordle/v2/{date}.json'
-        data = requests.get(url).json()
-        wordle_num = data['days_since_launch']
-        target_word = data['solution']
-        self.print_store(f'Confirming Wordle {wordle_num} solution from {url}')
-        self.print_store(f'Solution is {target_word==prediction}')
+        with self.stats.stage('verify'):
+            correct, source = self.verifier.verify(wordle_num, prediction)
+        self.print_store(f'Confirming Wordle {wordle_num} solution from {source}')
+        self.print_store(f'Solution is {correct}')
         if plot:
-            fig.show()
-        self.last_figure = fig
+            self.last_figure.show()
         return return_val
 
-    def solve_all(self, **kwargs):
-        if self.tweet_df is not None:
-            for wordle_num in sorted(self.tweet_df['wordle_id'].unique()):
-                self.solve(wordle_num, **kwargs)
+    @property
+    def last_figure(self):
+        """figure of the last solve, built the first time it is asked for"""
+        if self._last_figure is None and self._figure_args is not None:
+            return_full_plot, data, mask_result = self._figure_args
+            if mask_result:
+                data = data.sort_values().tail(20)
+                data.index = [help_hash(x)[:7] for x in data.index]
+            self._last_figure = self.make_figure(return_full_plot, data)
+        return self._last_figure
+
+    def solve_all(self, headless=False, **kwargs):
+        """solve every wordle with tweets. headless returns a DataFrame of the solve records"""
+        if self.wordle_counts:
+            self.verifier.prefetch(sorted(self.wordle_counts))
+            records = [
+                self.solve(wordle_num, headless=headless, **kwargs)
+                for wordle_num in sorted(self.wordle_counts)
+            ]
+            if headless:
+                return pd.DataFrame(records)
 
     def make_figure(self, make_full_plot, data):
-        if make_full_plot:
-            return data.sort_values().plot.bar(
-                labels={'index': 'Hashed Word', 'value': 'Normalized Score'}
-            )
-        else:
-            return (
-                data.sort_values()
-                .tail(20)
-                .plot.bar(labels={'index': 'Hashed Word', 'value': 'Normalized Score'})
-            )
+        with self.stats.stage('figure', items=len(data) if make_full_plot else min(len(data), 20)):
+            if make_full_plot:
+                return data.sort_values().plot.bar(
+                    labels={'index': 'Hashed Word', 'value': 'Normalized Score'}
+                )
+            else:
+                return (
+                    data.sort_values()
+                    .tail(20)
+                    .plot.bar(labels={'index': 'Hashed Word', 'value': 'Normalized Score'})
+                )
 
-    def show_bad_tweets(self, answer, wordle_num):
-        all_guesses = self.extract_all_guesses(wordle_num)
+    def profile_solve(self, wordle_num, trace_memory=False, top=25, **kwargs):
+        """Run one solve under cProfile (and tracemalloc with trace_memory), returns (result, report).
 
-        bad_guesses = set(all_guesses).difference(set(self.zipped_counters[answer].keys()))
+        See instrumentation.profile for the report.
+        """
+        return profile(self.solve, wordle_num, trace_memory=trace_memory, top=top, **kwargs)
+
+    def bad_tweet_rows(self, answer, wordle_num):
+        """(set of score lines answer can't make, tweet_df positions of the wordle_num tweets that have one)"""
+        start, stop = self.wordle_index.get(wordle_num, (0, 0))
+        offsets = self.score_offsets
+        codes = self.score_codes[offsets[start] : offsets[stop]]
+        bad = ~self.score_matrix.possible[self.score_matrix.word_index[answer]][codes]
+        tweet = np.repeat(np.arange(stop - start), np.diff(offsets[start : stop + 1]))
+        has_bad = np.bincount(tweet[bad], minlength=stop - start) > 0
+        return set(decode_scores(np.unique(codes[bad]))), self._wordle_rows[start:stop][has_bad]
 
-        thelocs = self.tweet_df['score_list'].apply(lambda x: any(y in x for y in bad_guesses))
+    def show_bad_tweets(self, answer, wordle_num):
+        bad_guesses, rows = self.bad_tweet_rows(answer, wordle_num)
 
         print(bad_guesses)
 
-        for x in self.tweet_df.loc[thelocs].query('wordle_id == @wordle_num')['tweet_text']:
+        for x in self.tweet_df['tweet_text'].iloc[rows]:
             print('------')
             print(x)
 
     def make_bad_df(self, answer, wordle_num):
-        all_guesses = self.extract_all_guesses(wordle_num)
-
-        bad_guesses = set(all_guesses).difference(set(self.zipped_counters[answer].keys()))
-
-        thelocs = self.tweet_df['score_list'].apply(lambda x: any(y in x for y in bad_guesses))
+        bad_guesses, rows = self.bad_tweet_rows(answer, wordle_num)
 
         print(bad_guesses)
 
-        return self.tweet_df.loc[thelocs].query('wordle_id == @wordle_num')
+        return self.tweet_df.iloc[rows]
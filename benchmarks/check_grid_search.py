@@ -0,0 +1,92 @@
+"""Check TwitterWordle.grid_search against the nested min_count / penalty loop solve used to run, offline.
+
+    python benchmarks/check_grid_search.py
+
+Every synthetic day is solved from a small sample of its tweets, so many days start with a low signal and some
+never reach the threshold and take the best delta fallback. For each day the chosen prediction, sigma and delta of
+grid_search must match the old loop, built here from solve_counts. A grid mixing the per target default penalty
+(a falsy term) with numeric ones must match solve_counts cell by cell.
+"""
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from run_benchmarks import prepare_workdir
+from synthetic import SyntheticTweets
+
+MIN_COUNTS = list(range(1, 13, 2))
+PENALTY_TERMS = [p * 1e7 for p in range(-7, -100, -2)]
+
+
+def nested_loop(t, counts, min_counts, penalty_terms, threshold=1.13):
+    """The loop solve ran before grid_search: stop at the first delta above threshold, else take the best delta
+    unless the last one is already within 1.1. Returns (prediction, sigma, delta, case)."""
+    iterated = []
+    for min_count in min_counts:
+        for penalty_term in penalty_terms:
+            prediction, sigma, _, delta, _ = t.solve_counts(
+                counts, min_count=min_count, penalty_term=penalty_term, verbose=False
+            )
+            iterated.append((prediction, sigma, delta))
+            if delta > threshold:
+                return prediction, sigma, delta, 'threshold'
+    if delta < 1.1:
+        return *sorted(iterated, key=lambda x: x[2])[-1], 'best_delta'
+    return prediction, sigma, delta, 'last'
+
+
+def check_days(t, corpus, n_tweets):
+    cases = {}
+    for wordle_num in corpus.wordle_nums:
+        counts = t.pattern_counts(wordle_num, downsample=n_tweets, verbose=False)
+        grid = t.grid_search(counts, MIN_COUNTS, PENALTY_TERMS)
+        prediction, sigma, delta, case = nested_loop(t, counts, MIN_COUNTS, PENALTY_TERMS)
+        assert grid['prediction'] == prediction, (wordle_num, grid['prediction'], prediction)
+        assert np.isclose(grid['sigma'], sigma) and np.isclose(grid['delta'], delta), wordle_num
+        cases[case] = cases.get(case, 0) + 1
+    return cases
+
+
+def check_mixed_penalties(t, wordle_num):
+    counts = t.pattern_counts(wordle_num, verbose=False)
+    min_counts, penalty_terms = [1, 3], [0, -5e7, None]
+    grid = t.grid_search(counts, min_counts, penalty_terms)
+    assert grid['deltas'].shape == (len(min_counts), len(penalty_terms))
+    for i, min_count in enumerate(min_counts):
+        for j, penalty_term in enumerate(penalty_terms):
+            prediction, sigma, _, delta, _ = t.solve_counts(
+                counts, min_count=min_count, penalty_term=penalty_term, verbose=False
+            )
+            assert grid['predictions'][i, j] == prediction, (min_count, penalty_term)
+            assert np.isclose(grid['sigmas'][i, j], sigma) and np.isclose(grid['deltas'][i, j], delta)
+
+
+def main(n_tweets=40, seed=0):
+    from pattern_matrix import make_zipped_counters
+    from TwitterWordle import TwitterWordle
+    from verify import HashVerifier
+
+    workdir = tempfile.mkdtemp(prefix='twitterwordle_check_')
+    cwd = os.getcwd()
+    try:
+        corpus = SyntheticTweets(seed=seed)
+        prepare_workdir(corpus, workdir)
+        with open('zipped_counters_nyt_2022_02_15.json', 'w') as f:
+            json.dump(make_zipped_counters(corpus.targets, corpus.freqs, corpus.all_words), f)
+        with contextlib.redirect_stdout(io.StringIO()):
+            t = TwitterWordle(corpus.frame(20_000), verifier=HashVerifier(corpus.hash_dict()))
+        cases = check_days(t, corpus, n_tweets)
+        check_mixed_penalties(t, corpus.wordle_nums[0])
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(f'grid_search matches the nested loop on {sum(cases.values())} days {cases}, mixed penalties ok')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""Time and memory of the pipeline stages on synthetic tweets, fully offline.
+
+    python benchmarks/run_benchmarks.py --sizes 1k 100k --output bench.json
+    python benchmarks/run_benchmarks.py --sizes 10m --output bench_10m.json
+    python benchmarks/run_benchmarks.py --compare old.json new.json
+
+Everything runs in a scratch directory holding the word lists, a lookup dictionary built from the synthetic word
+frequencies and a solution file for the synthetic answers, so no Kaggle data, unigram_freq.csv or config.py is
+needed. Every stage records wall time and, with tracemalloc on, the peak of memory allocated during the stage. The
+json results also hold the commit and library versions, so two runs can be compared with --compare.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from synthetic import REPO, SyntheticTweets
+
+SIZES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+# above this many tweets the corpus is only handled in chunks
+IN_MEMORY_LIMIT = 1_000_000
+CHUNKSIZE = 1_000_000
+LINKED_FILES = [
+    'wordle-all_2022-02-15.txt',
+    'wordle-dictionary-full.txt',
+    'wordle-targets_2022-02-15.txt',
+    'hashed_lookup2.json',
+]
+
+
+class Recorder:
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.results = []
+
+    @contextlib.contextmanager
+    def stage(self, name, size=None, quiet=True, **extra):
+        """Time the block and record its peak traced memory, extra can be updated inside the block"""
+        if self.trace_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+        out = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(out) if quiet else contextlib.nullcontext():
+            yield extra
+        seconds = time.perf_counter() - start
+        result = {'stage': name, 'size': size, 'seconds': round(seconds, 4)}
+        if self.trace_memory:
+            result['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+            tracemalloc.stop()
+        result.update(extra)
+        self.results.append(result)
+        print(
+            f"{name:<24} {'' if size is None else size:>10} {seconds:9.3f}s"
+            + (f" {result['peak_mb']:9.1f} MB" if self.trace_memory else '')
+        )
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=REPO, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def prepare_workdir(corpus, workdir):
+    """Link the word lists, write the synthetic solution file and the lookup dictionary TwitterWordle loads"""
+    for name in LINKED_FILES:
+        os.symlink(os.path.join(REPO, name), os.path.join(workdir, name))
+    corpus.write_solution_file(os.path.join(workdir, 'solutions.txt'))
+    os.chdir(workdir)
+
+
+def bench_lookup_build(corpus, recorder):
+    from pattern_matrix import make_zipped_counters
+
+    with recorder.stage('lookup_build', targets=len(corpus.targets)):
+        zipped_counters = make_zipped_counters(corpus.targets, corpus.freqs, corpus.all_words)
+    with open('zipped_counters_nyt_2022_02_15.json', 'w') as f:
+        json.dump(zipped_counters, f)
+
+
+def bench_helper_func(corpus, recorder, n_targets=5):
+    import helper
+
+    with recorder.stage('helper_func', targets=n_targets) as extra:
+        for target in corpus.targets[:n_targets]:
+            helper.helper_func(target, corpus.freqs)
+    extra['seconds_per_target'] = round(recorder.results[-1]['seconds'] / n_targets, 4)
+    recorder.results[-1].update(extra)
+
+
+def bench_size(corpus, recorder, label, n_tweets):
+    from TwitterWordle import TwitterWordle
+    from first_word import make_first_guest_list
+    from ingest import count_patterns, merge_counts, sorted_counts
+    from solutions import SolutionRegistry
+    from verify import HashVerifier
+
+    verifier = HashVerifier(corpus.hash_dict())
+    in_memory = n_tweets <= IN_MEMORY_LIMIT
+    if in_memory:
+        with recorder.stage('generate', label, tweets=n_tweets):
+            df = corpus.frame(n_tweets)
+        with recorder.stage('twitter_wordle_init', label):
+            t = TwitterWordle(df, verifier=verifier)
+
+    with recorder.stage('ingest_counts', label):
+        total = {}
+        for chunk in [df] if in_memory else corpus.frames(n_tweets, CHUNKSIZE):
+            merge_counts(total, count_patterns(chunk))
+        total = sorted_counts(total)
+    if not in_memory:
+        t = TwitterWordle.from_pattern_counts(total['patterns'], total['tweets'], verifier=verifier)
+
+    wordle_num = corpus.wordle_nums[0]
+    with recorder.stage('solve', label):
+        t.solve(wordle_num, mask_result=False)
+    with recorder.stage('solve_all', label) as extra:
+        records = t.solve_all(headless=True, mask_result=False)
+        extra['accuracy'] = float(
+            (records['prediction'] == records['wordle_num'].map(corpus.answers)).mean()
+        )
+
+    zip_path = f'tweets_{label}.zip'
+    corpus.write_zip(n_tweets, zip_path, CHUNKSIZE)
+    solutions = SolutionRegistry(
+        solution_file='solutions.txt', history_file='no_history.json', corrections={}
+    )
+    with recorder.stage('make_first_guest_list', label) as extra:
+        first_guess_list = make_first_guest_list(
+            zip_path,
+            chunksize=None if in_memory else CHUNKSIZE,
+            freq_map=corpus.freqs,
+            solutions=solutions,
+        )
+        extra['rows'] = len(first_guess_list)
+    os.remove(zip_path)
+
+
+def run(sizes, output=None, trace_memory=True, seed=0):
+    pd.options.plotting.backend = 'plotly'
+    recorder = Recorder(trace_memory=trace_memory)
+    workdir = tempfile.mkdtemp(prefix='twitterwordle_bench_')
+    cwd = os.getcwd()
+    try:
+        corpus = SyntheticTweets(seed=seed)
+        prepare_workdir(corpus, workdir)
+        bench_lookup_build(corpus, recorder)
+        bench_helper_func(corpus, recorder)
+        for label in sizes:
+            bench_size(corpus, recorder, label, SIZES[label])
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    report = {
+        'environment': environment(),
+        'seed': seed,
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'results': recorder.results,
+    }
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=4)
+    return report
+
+
+def compare(old_path, new_path):
+    """Print old vs new seconds and peak memory for every stage both runs have"""
+    with open(old_path) as f:
+        old = {(x['stage'], x['size']): x for x in json.load(f)['results']}
+    with open(new_path) as f:
+        new = json.load(f)['results']
+    print(f"{'stage':<24} {'size':>6} {'old s':>9} {'new s':>9} {'ratio':>7} {'old MB':>9} {'new MB':>9}")
+    for result in new:
+        before = old.get((result['stage'], result['size']))
+        if before is None:
+            continue
+        print(
+            f"{result['stage']:<24} {result['size'] or '':>6} {before['seconds']:9.3f} {result['seconds']:9.3f}"
+            f" {result['seconds'] / max(before['seconds'], 1e-9):7.2f}"
+            f" {before.get('peak_mb', float('nan')):9.1f} {result.get('peak_mb', float('nan')):9.1f}"
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='TwitterWordle benchmarks on synthetic tweets')
+    parser.add_argument('--sizes', nargs='+', default=['1k', '100k'], choices=list(SIZES))
+    parser.add_argument('--output', help='json file for the results')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--no-tracemalloc', action='store_true', help='only time the stages, tracemalloc slows them down'
+    )
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+    else:
+        run(args.sizes, args.output, trace_memory=not args.no_tracemalloc, seed=args.seed)
@@ -0,0 +1,103 @@
+"""Deterministic synthetic wordle tweets, so the benchmarks need no Kaggle data or network.
+
+Answers come from wordle-targets_2022-02-15.txt and guesses from wordle-all_2022-02-15.txt, with a Zipf-like
+popularity so common words are guessed more often, like the real tweets. Every score line is looked up in a
+pattern_matrix, so duplicate letters are scored like the game. A few percent of the tweets are the kinds the
+filters throw out (links, the wrong wordle number, more than six lines). The same seed always gives the same
+corpus, and frames(n) yields it in chunks so 10M tweets never have to be in memory at once.
+"""
+import hashlib
+import os
+import sys
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+
+from pattern_matrix import pattern_matrix, read_words  # noqa: E402
+from score_matrix import ALL_SCORES, SCORE_TO_CODE  # noqa: E402
+
+EMOJI = {'0': '⬛', '1': '🟨', '2': '🟩'}
+EMOJI_LINES = [''.join(EMOJI[x] for x in score) for score in ALL_SCORES]
+SOLVED = SCORE_TO_CODE['22222']
+
+
+class SyntheticTweets:
+    """A corpus of tweets for n_wordles consecutive wordle numbers starting at first_wordle."""
+
+    def __init__(self, n_wordles=20, first_wordle=200, seed=0, repo=REPO):
+        rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.targets = read_words(os.path.join(repo, 'wordle-targets_2022-02-15.txt'))
+        self.guesses = read_words(os.path.join(repo, 'wordle-all_2022-02-15.txt'))
+        self.all_words = read_words(os.path.join(repo, 'wordle-dictionary-full.txt'))
+        self.wordle_nums = list(range(first_wordle, first_wordle + n_wordles))
+        picks = rng.choice(len(self.targets), n_wordles, replace=False)
+        self.answers = {n: self.targets[i] for n, i in zip(self.wordle_nums, picks)}
+
+        # popularity falls off as 1 / rank over a fixed shuffle of the dictionary
+        ranks = rng.permutation(len(self.all_words)) + 1
+        self.freqs = {word: int(1e9 // rank) for word, rank in zip(self.all_words, ranks)}
+        weights = np.array([self.freqs.get(x, 1) for x in self.guesses], dtype=np.float64)
+        self.guess_p = weights / weights.sum()
+        # (guesses, wordles) score codes
+        self.codes = pattern_matrix(self.guesses, [self.answers[n] for n in self.wordle_nums])
+
+    def frame(self, n_tweets, block=0):
+        """DataFrame of tweet_text and wordle_id, block picks an independent, reproducible part of the corpus"""
+        rng = np.random.default_rng([self.seed, block])
+        days = rng.integers(len(self.wordle_nums), size=n_tweets)
+        n_lines = rng.integers(1, 7, size=n_tweets)
+        solved = rng.random(n_tweets) < 0.9
+        guesses = rng.choice(len(self.guesses), size=(n_tweets, 7), p=self.guess_p)
+        codes = self.codes[guesses, days[:, None]]
+        codes[np.arange(n_tweets), n_lines - 1] = np.where(
+            solved, SOLVED, codes[np.arange(n_tweets), n_lines - 1]
+        )
+        noise = rng.random(n_tweets)
+        # 2% links, 2% the wrong wordle number, 1% seven lines
+        n_lines[noise > 0.99] = 7
+        wordle_nums = np.array(self.wordle_nums)[days]
+        text_nums = np.where((noise > 0.97) & (noise <= 0.99), wordle_nums + 1, wordle_nums)
+
+        texts = []
+        for num, k, is_solved, row, u in zip(
+            text_nums.tolist(), n_lines.tolist(), solved.tolist(), codes.tolist(), noise.tolist()
+        ):
+            body = '\n'.join(EMOJI_LINES[x] for x in row[:k])
+            text = f'Wordle {num} {k if is_solved else "X"}/6\n\n{body}'
+            if u > 0.95 and u <= 0.97:
+                text += ' https://t.co/xxxxxxxxxx'
+            texts.append(text)
+        return pd.DataFrame({'tweet_text': texts, 'wordle_id': wordle_nums})
+
+    def frames(self, n_tweets, chunksize=1_000_000):
+        """the corpus of n_tweets as frames of at most chunksize tweets"""
+        for block, start in enumerate(range(0, n_tweets, chunksize)):
+            yield self.frame(min(chunksize, n_tweets - start), block=block)
+
+    def hash_dict(self):
+        """{wordle_num: sha256 of the answer} for verify.HashVerifier"""
+        return {
+            str(n): hashlib.sha256(answer.encode()).hexdigest() for n, answer in self.answers.items()
+        }
+
+    def write_solution_file(self, path):
+        """One word per line, line i is the answer to wordle i, like config.wordle_solution_file_path"""
+        filler = [x for x in self.targets if x not in set(self.answers.values())]
+        words = [filler[i % len(filler)] for i in range(max(self.wordle_nums) + 1)]
+        for n, answer in self.answers.items():
+            words[n] = answer
+        with open(path, 'w') as f:
+            f.write('\n'.join(words) + '\n')
+
+    def write_zip(self, n_tweets, path, chunksize=1_000_000):
+        """The corpus as a zip holding tweets.csv, like the Kaggle download"""
+        with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as myzip:
+            with myzip.open('tweets.csv', 'w') as f:
+                for i, df in enumerate(self.frames(n_tweets, chunksize)):
+                    f.write(df.to_csv(index=False, header=i == 0).encode())
@@ -0,0 +1,303 @@
+"""Collect tweets for several wordles at once with asyncio.
+
+Paging through one query is sequential (each page holds the token for the next one), but the queries for
+different wordles are independent. TweetCollector runs one pager per wordle concurrently, all sharing a token
+bucket RateLimiter that also backs off on 429 responses. Requests go through requests in worker threads
+(asyncio.to_thread), so there is no new http dependency. Each page is counted with ingest.count_patterns as it
+arrives, so the totals are ready as soon as the last page comes in:
+
+    wordle_counts, wordle_tweet_counts = collect_counts(range(228, 236), bearer_token=token)
+    t = TwitterWordle.from_pattern_counts(wordle_counts, wordle_tweet_counts)
+
+MockSearchServer is a local stand-in for the recent search endpoint. It replays recorded pages, with optional
+latency and rate limits, so the collector can be benchmarked and tested offline:
+
+    python collector.py 228 229 230 --mock tweets.csv --latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import requests
+
+from ingest import count_patterns, merge_counts, sorted_counts
+
+SEARCH_URL = 'https://api.twitter.com/2/tweets/search/recent'
+
+
+class RateLimiter:
+    """Token bucket shared by every request, at most rate requests per period seconds with bursts up to burst.
+
+    The default is the recent search app limit of 450 requests per 15 minutes. pause_until holds every request
+    back, e.g. until the reset time a 429 response sent.
+    """
+
+    def __init__(self, rate=450, period=900.0, burst=10):
+        self.interval = period / rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.interval)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) * self.interval)
+
+    def pause_until(self, when):
+        """when is a time.monotonic() value"""
+        self.paused_until = max(self.paused_until, when)
+
+
+class TweetCollector:
+    """Fetch pages of recent search results for many wordle queries concurrently."""
+
+    def __init__(
+        self,
+        bearer_token=None,
+        url=SEARCH_URL,
+        limiter=None,
+        max_concurrency=8,
+        timeout=30,
+        max_retries=5,
+    ):
+        self.url = url
+        self.headers = {'Authorization': f'Bearer {bearer_token}'} if bearer_token else {}
+        self.limiter = RateLimiter() if limiter is None else limiter
+        self.max_concurrency = max_concurrency
+        # at most max_concurrency requests in flight, asyncio primitives only bind to a loop once they wait
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.requests = 0
+        self.local = threading.local()
+
+    @classmethod
+    def from_credentials(cls, filename='~/.twitter_keys.yaml', yaml_key='search_tweets_v2', **kwargs):
+        """Collector using the same searchtweets credentials file as get_tweets"""
+        from searchtweets import load_credentials
+
+        search_args = load_credentials(filename, yaml_key=yaml_key, env_overwrite=False)
+        return cls(search_args['bearer_token'], url=search_args.get('endpoint', SEARCH_URL), **kwargs)
+
+    def _get(self, params):
+        # one session per worker thread, a session keeps its connections open between pages
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+        return self.local.session.get(
+            self.url, params=params, headers=self.headers, timeout=self.timeout
+        )
+
+    async def fetch_page(self, query, next_token=None, max_results=100):
+        params = {'query': query, 'max_results': max_results}
+        if next_token:
+            params['next_token'] = next_token
+        for attempt in range(self.max_retries):
+            await self.limiter.acquire()
+            async with self.semaphore:
+                response = await asyncio.to_thread(self._get, params)
+            self.requests += 1
+            if response.status_code == 429:
+                reset = response.headers.get('x-rate-limit-reset')
+                wait = max(float(reset) - time.time(), 1.0) if reset else 2.0**attempt
+                print(f'Rate limited on {query!r}, waiting {wait:.0f}s')
+                self.limiter.pause_until(time.monotonic() + wait)
+                continue
+            if response.status_code >= 500:
+                await asyncio.sleep(2.0**attempt)
+                continue
+            response.raise_for_status()
+            return response.json()
+        raise RuntimeError(f'Gave up on {query!r} after {self.max_retries} attempts')
+
+    async def pages(self, wordle_num, max_tweets=3000):
+        """Raw result pages for one wordle, in order, until max_tweets or the results run out."""
+        query = f'Wordle {wordle_num}'
+        next_token = None
+        n_tweets = 0
+        while n_tweets < max_tweets:
+            # the endpoint takes 10 to 100 results per call
+            page = await self.fetch_page(query, next_token, min(100, max(10, max_tweets - n_tweets)))
+            if 'data' in page:
+                page['data'] = page['data'][: max_tweets - n_tweets]
+                n_tweets += len(page['data'])
+            yield page
+            next_token = page.get('meta', {}).get('next_token')
+            if not next_token:
+                return
+
+    async def stream(self, wordle_nums, max_tweets=3000):
+        """(wordle_num, list of tweet text) for every page of every wordle, in the order they arrive"""
+        queue = asyncio.Queue(maxsize=4 * self.max_concurrency)
+        finished = object()
+
+        async def produce(wordle_num):
+            try:
+                async for page in self.pages(wordle_num, max_tweets):
+                    await queue.put((wordle_num, [x['text'] for x in page.get('data', [])]))
+            except Exception as e:
+                await queue.put((wordle_num, e))
+            await queue.put((wordle_num, finished))
+
+        tasks = [asyncio.create_task(produce(wordle_num)) for wordle_num in wordle_nums]
+        remaining = len(tasks)
+        try:
+            while remaining:
+                wordle_num, texts = await queue.get()
+                if texts is finished:
+                    remaining -= 1
+                elif isinstance(texts, Exception):
+                    raise texts
+                else:
+                    yield wordle_num, texts
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def collect_counts(self, wordle_nums, max_tweets=3000):
+        """{'patterns': ..., 'tweets': ...} like ingest.count_patterns, each page is counted when it arrives"""
+        total = {}
+        async for wordle_num, texts in self.stream(wordle_nums, max_tweets):
+            if texts:
+                df = pd.DataFrame({'tweet_text': texts, 'wordle_id': wordle_num})
+                merge_counts(total, count_patterns(df))
+        return sorted_counts(total)
+
+
+def collect_counts(wordle_nums, max_tweets=3000, **kwargs):
+    """Per wordle pattern counts and tweet counts for TwitterWordle.from_pattern_counts"""
+    total = asyncio.run(TweetCollector(**kwargs).collect_counts(wordle_nums, max_tweets))
+    return total.get('patterns', {}), total.get('tweets', {})
+
+
+def pages_from_frame(df, page_size=100):
+    """Turn a frame of tweet_text and wordle_id into recorded pages {query: [page, ...]} for MockSearchServer"""
+    pages = {}
+    for wordle_num, group in df.groupby('wordle_id'):
+        texts = group['tweet_text'].tolist()
+        pages[f'Wordle {wordle_num}'] = [
+            {
+                'data': [{'text': text} for text in texts[i : i + page_size]],
+                'meta': {'result_count': len(texts[i : i + page_size])},
+            }
+            for i in range(0, len(texts), page_size)
+        ]
+    return pages
+
+
+class MockSearchServer:
+    """Local stand-in for the recent search endpoint that replays recorded pages.
+
+    pages is {query: [page json, ...]}, the next_token of a page is the index of the next one. Every response
+    waits latency seconds, and with rate set, requests over rate per period get a 429 with x-rate-limit-reset.
+    """
+
+    def __init__(self, pages, latency=0.0, rate=None, period=900.0):
+        self.pages = pages
+        self.latency = latency
+        self.rate = rate
+        self.period = period
+        self.request_times = []
+        self.lock = threading.Lock()
+        self.server = None
+
+    def _respond(self, query, token):
+        with self.lock:
+            now = time.time()
+            self.request_times = [x for x in self.request_times if x > now - self.period]
+            if self.rate is not None and len(self.request_times) >= self.rate:
+                return 429, {'x-rate-limit-reset': str(int(self.request_times[0] + self.period) + 1)}, {}
+            self.request_times.append(now)
+        time.sleep(self.latency)
+        recorded = self.pages.get(query, [])
+        index = int(token or 0)
+        if index >= len(recorded):
+            return 200, {}, {'meta': {'result_count': 0}}
+        page = json.loads(json.dumps(recorded[index]))
+        if index + 1 < len(recorded):
+            page.setdefault('meta', {})['next_token'] = str(index + 1)
+        return 200, {}, page
+
+    def start(self):
+        """Serve in a background thread and return the url to give TweetCollector"""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = parse_qs(urlparse(self.path).query)
+                status, headers, body = mock._respond(
+                    params.get('query', [''])[0], params.get('next_token', [None])[0]
+                )
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                for key, val in headers.items():
+                    self.send_header(key, val)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f'http://127.0.0.1:{self.server.server_port}/2/tweets/search/recent'
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def __enter__(self):
+        self.url = self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Collect wordle tweets for several wordles at once')
+    parser.add_argument('wordle_nums', type=int, nargs='+')
+    parser.add_argument('--max-tweets', type=int, default=3000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--mock', help='csv of tweet_text and wordle_id to replay from a local server')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds per mock response')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.mock:
+        with MockSearchServer(pages_from_frame(pd.read_csv(args.mock)), args.latency) as mock:
+            collector = TweetCollector(
+                url=mock.url,
+                limiter=RateLimiter(rate=1e6, period=1),
+                max_concurrency=args.concurrency,
+            )
+            total = asyncio.run(collector.collect_counts(args.wordle_nums, args.max_tweets))
+    else:
+        collector = TweetCollector.from_credentials(max_concurrency=args.concurrency)
+        total = asyncio.run(collector.collect_counts(args.wordle_nums, args.max_tweets))
+    elapsed = time.perf_counter() - start
+    n_tweets = sum(total.get('tweets', {}).values())
+    print(
+        f'{collector.requests} requests, {n_tweets} tweets kept in {elapsed:.1f}s, '
+        f'{collector.requests / elapsed:.1f} pages/s'
+    )
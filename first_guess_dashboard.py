@@ -2,25 +2,23 @@ import dash
 from dash import Dash, html, dcc, Input, Output, State, ALL, MATCH
 import dash_bootstrap_components as dbc
 import dash_dataframe_table
-from sqlalchemy import create_engine
-from first_word import map_to_emoji, better_wordle_solutions
+from first_word import map_to_emoji
+from opener_db import OpenerDB
+from solutions import registry
 from helper import flatten_columns
 from ast import literal_eval
+import json
 
 import pandas as pd
 pd.DataFrame.flatten_columns = flatten_columns
 import numpy as np
 pd.options.plotting.backend = 'plotly'
 
-wordle_lookup = better_wordle_solutions()
-sql_db = create_engine('sqlite:///wordle_first_words.db')
+opener_db = OpenerDB('wordle_first_words.db')
 
-all_guesses = pd.read_sql("select distinct guess from main; ",
-                          sql_db)['guess'].sort_values().tolist()
+all_guesses = opener_db.distinct('guess')
 
-all_numbers = pd.read_sql(
-    "select distinct wordle_num from main; ",
-    sql_db)['wordle_num'].sort_values().astype(int).tolist()
+all_numbers = [int(x) for x in opener_db.distinct('wordle_num')]
 
 app = Dash(__name__,
            external_stylesheets=[dbc.themes.YETI],
@@ -30,6 +28,11 @@ app = Dash(__name__,
 
 server = app.server
 
+
+@server.route('/dash/wordle_openers/cache-stats')
+def cache_stats():
+    return opener_db.cache.stats()
+
 main_content = [
     html.Div(children=[
         dbc.Label("Choose Wordle Opener for Day by Day Graph...",
@@ -120,12 +123,16 @@ app.layout = dbc.Container(
     Input('wordle-num-range', 'value'),
 )
 def make_graph(guess, max_guess_count, wordle_range):
-    mean_score = pd.read_sql(
-        f"select avg(score_frequency_rank) from main where guess = {guess!r} and score <> '00000'",
-        con=sql_db).iloc[0, 0]
+    figure_json = opener_db.cache.get_or_compute(
+        ('make_graph', guess, max_guess_count, wordle_range),
+        lambda: make_figure(guess, max_guess_count, wordle_range).to_json())
+    return [dcc.Graph(figure=json.loads(figure_json), id='guess-graph')]
+
 
-    plot_data = pd.read_sql(f"select * from main where guess = {guess!r}",
-                            con=sql_db)
+def make_figure(guess, max_guess_count, wordle_range):
+    mean_score = opener_db.mean_rank(guess)
+
+    plot_data = opener_db.guess_rows(guess)
 
     plot_data['valid_flag'] = (plot_data['guess_count'] <=
                                max_guess_count).astype(int)
@@ -155,8 +162,7 @@ def make_graph(guess, max_guess_count, wordle_range):
     myplot.update_yaxes(autorange="reversed")
     myplot.update_layout(legend=dict(
         orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1))
-
-    return [dcc.Graph(figure=myplot, id='guess-graph')]
+    return myplot
 
 
 @app.callback(Output("detail-row", 'children'),
@@ -172,11 +178,9 @@ def make_detail(clickData, guess):
     wordle_num = clickData['points'][0]['x']
     print(score, wordle_num)
 
-    df = pd.read_sql(
-        f"select guess,commonality from main where score = {score!r} and wordle_num = {wordle_num} and commonality > 0 order by commonality DESC",
-        con=sql_db)
+    df = opener_db.pattern_guesses(score, wordle_num)
 
-    answer = wordle_lookup.get(wordle_num)
+    answer = registry.word(wordle_num)
     return [
         html.
         P(f'{len(df)} guesses with pattern {pattern} for Wordle {wordle_num} and answer {answer.upper()}'
@@ -201,11 +205,7 @@ def make_leader_table(max_guess_count, min_data_count, wordle_num_range):
     return dbc.Col([
         html.H5("Estimated Top Wordle Openers"),
         dbc.Table.from_enhanced_dataframe(
-            pd.read_sql(
-                f"""select guess, AVG(weighted_rank) as weighted_rank_mean ,count(weighted_rank) as 
- weighted_rank_count from main where score <> '00000'  
- and guess_count <= {max_guess_count} and wordle_num between {wmin} and {wmax}  group by guess having weighted_rank_count >= {min_data_count} order by weighted_rank_mean limit 25; """,
-                sql_db),
+            opener_db.leaders(max_guess_count, wmin, wmax, min_data_count),
             button_columns=['guess'],
         )
     ])
@@ -1,14 +1,25 @@
+import hashlib
+import json
+import numpy as np
 import pandas as pd
-from TwitterWordle import TwitterWordle, check_match
-from helper import get_num_line, stringify, make_freqs
+from TwitterWordle import TwitterWordle, filter_tweets, parse_score_lines
+from helper import make_freqs
+from instrumentation import Stats
+from ingest import merge_counts
+from lookup_store import load_or_convert
+from pattern_matrix import pattern_matrix
+from score_matrix import (NUM_PATTERNS, SCORE_STRINGS, SCORE_TO_CODE,
+                          encode_scores, has_pattern, pack_patterns)
+from solutions import registry
 import zipfile
 from IPython.display import display, HTML
 
-import json
-import config
 
 image_mapping_dict = {1: "🟨", 0: "⬜", 2: "🟩"}
 
+# per stage timings of the opener pipeline, set stats.enabled = True to record them
+stats = Stats(enabled=False)
+
 
 def format_df(df, **kwargs):
     """format the dataframe for display without index"""
@@ -19,35 +30,28 @@ def map_to_emoji(pattern):
     return ''.join([image_mapping_dict[int(x)] for x in pattern])
 
 
-pattern_lookup_dict = {
-    key: val
-    for key, val in json.load(open("zipped_counters_nyt_2022_02_15.json", "r"))
-}
+_possible_index = None
+
+
+def possible_index():
+    """({answer: row}, (answers + 1, 4) uint64 bitsets of the patterns each answer can make).
+
+    Built once from the zipped counters lookup store. The extra last row is all zeros, for unknown answers.
+    """
+    global _possible_index
+    if _possible_index is None:
+        score_matrix = load_or_convert("zipped_counters_nyt_2022_02_15.json")
+        bitsets = np.vstack([
+            pack_patterns(score_matrix.possible),
+            pack_patterns(np.zeros(NUM_PATTERNS, dtype=bool))
+        ])
+        _possible_index = (score_matrix.word_index, bitsets)
+    return _possible_index
 
 
 def better_wordle_solutions():
-    wordle_lookup = {
-        i: x
-        for i, x in enumerate(
-            pd.read_csv(config.wordle_solution_file_path, header=None)
-            [0].tolist())
-    }
-    new_dict = pd.read_json("../wordle_public/better_history.json").set_index(
-        'wordle_num')['word'].to_dict()
-    wordle_lookup.update(new_dict)
-    wordle_lookup.update({
-        335: 'gamer',
-        401: 'elope',
-        402: 'cinch',
-        420: 'hunky',
-        361: 'atone',
-        365: 'cacao',
-        368: 'gloat',
-        370: 'brink',
-        386: 'stead',
-        388: 'madam',
-    })
-    return wordle_lookup
+    """{wordle_num: word} of every known solution, from the shared solutions.registry"""
+    return registry.to_dict()
 
 
 def try_fail(x):
@@ -59,62 +63,215 @@ def try_fail(x):
 
 def flag_possible_only(score_pattern_list, answer):
     """returns false if a guess is impossible"""
+    codes = encode_scores(score_pattern_list)
+    offsets = np.array([0, len(codes)])
+    return bool(flag_possible_tweets(codes, offsets, [answer])[0])
 
-    return all(
-        pattern_lookup_dict.get(answer, {}).get(y) is not None
-        for y in score_pattern_list)
 
+def flag_possible_tweets(codes, offsets, answers):
+    """flag_possible_only for every tweet at once, from (codes, offsets) score line storage.
 
-def get_first_words(df):
-    reverse_map = {val: key for key, val in better_wordle_solutions().items()}
+    Each score line is checked against its answer's bitset, and a tweet is valid when none of its lines are missing.
+    """
+    word_index, bitsets = possible_index()
+    unknown = len(bitsets) - 1
+    answer_rows = np.array([word_index.get(x, unknown) for x in answers],
+                           dtype=np.intp)
+    lines_per_tweet = np.diff(offsets)
+    ok = has_pattern(bitsets, np.repeat(answer_rows, lines_per_tweet), codes)
+    bad_lines = np.bincount(np.repeat(np.arange(len(answer_rows)),
+                                      lines_per_tweet),
+                            weights=~ok,
+                            minlength=len(answer_rows))
+    return bad_lines == 0
 
-    df['score_list'] = df['tweet_text'].apply(TwitterWordle.wordle_guesses)
-    short_words = pd.read_csv('wordle-all_2022-02-15.txt', header=None)[0]
-    df['first_score'] = df['tweet_text'].apply(try_fail)
 
-    df['answer'] = df['wordle_id'].map(better_wordle_solutions())
-    df['valid'] = df[['score_list', 'answer'
-                      ]].apply(lambda x: flag_possible_only(x[0], x[1]),
-                               axis=1)
-    out = []
+def count_first_scores(df, solutions):
+    """Filter a frame (or chunk) of tweets and reduce it to how often each first score line was tweeted per answer.
+
+    Returns {'first_scores': {(answer, first_score): count}, 'answers': {answer: rows}, 'rows': {'total': n,
+    'kept': n}}, so results for several chunks can be summed with ingest.merge_counts.
+    """
+    with stats.stage('parse', items=len(df)):
+        codes, offsets = parse_score_lines(df['tweet_text'])
+        lines_per_tweet = np.diff(offsets)
+        has_lines = lines_per_tweet > 0
+        first_score = np.full(len(df), None, dtype=object)
+        first_score[has_lines] = SCORE_STRINGS[codes[offsets[:-1][has_lines]]]
+        df['first_score'] = first_score
+
+    with stats.stage('validity', items=len(codes)):
+        df['answer'] = df['wordle_id'].map(solutions)
+        valid = flag_possible_tweets(codes, offsets, df['answer'].tolist())
     pre_filter_ln = len(df)
-    df = df.loc[df.loc[:, ['tweet_text', 'wordle_id']].apply(check_match,
-                                                             axis=1)]
-    df = df.loc[df.loc[:, 'score_list'].apply(lambda x: len(x) <= 6)]
-
-    df = df.query('valid == True')
-    print(f"Filtered out {pre_filter_ln - len(df)} of {pre_filter_ln} rows")
-    for answer, _df in df.groupby('answer'):
-        rank_lookup = _df['first_score'].value_counts().rank(
-            ascending=False).to_dict()
-        count_fraction_lookup = (
-            _df['first_score'].value_counts() /
-            _df['first_score'].value_counts().sum()).to_dict()
-        temp_df = pd.DataFrame([{
-            'score': stringify(get_num_line(x, answer)),
-            'target': answer,
-            'guess': x
-        } for x in short_words])
-        temp_df['score_frequency_rank'] = temp_df['score'].map(rank_lookup)
-        temp_df['score_count_fraction'] = temp_df['score'].map(
-            count_fraction_lookup)
-
-        out.append(temp_df)
-    df_concat = pd.concat(out)
-    df_concat['wordle_num'] = df_concat['target'].map(reverse_map)
-    df_concat['guess_count'] = df_concat.groupby(
-        ['target', 'score'])['guess'].transform('count')
+    with stats.stage('filter', items=len(df)):
+        keep = (filter_tweets(df['tweet_text'], df['wordle_id'])
+                & (lines_per_tweet <= 6) & valid)
+        df = df.loc[keep]
+    with stats.stage('first_score_counts', items=len(df)):
+        return {
+            'first_scores':
+            df.groupby('answer')['first_score'].value_counts().to_dict(),
+            'answers': df['answer'].value_counts().to_dict(),
+            'rows': {
+                'total': pre_filter_ln,
+                'kept': len(df)
+            },
+        }
+
+
+def first_words_from_counts(counts, solutions=None):
+    """Build the opener table from the output of count_first_scores.
+
+    Every guess is scored against every answer at once with pattern_matrix, then the rank, count fraction and
+    guess count of each (answer, score) pair are looked up from dense answers x 243 tables.
+    """
+    reverse_map = (registry if solutions is None else solutions).reverse_dict()
+    short_words = pd.read_csv('wordle-all_2022-02-15.txt', header=None)[0]
+    print(
+        f"Filtered out {counts['rows']['total'] - counts['rows']['kept']} of {counts['rows']['total']} rows"
+    )
+    answers = sorted(counts['answers'])
+    answer_index = {answer: i for i, answer in enumerate(answers)}
+
+    first_scores = pd.Series(counts['first_scores'], dtype=float)
+    first_scores = first_scores[first_scores.index.get_level_values(0).isin(
+        answer_index)]
+    rank_table = np.full((len(answers), NUM_PATTERNS), np.nan)
+    fraction_table = np.full((len(answers), NUM_PATTERNS), np.nan)
+    if len(first_scores):
+        by_answer = first_scores.groupby(level=0)
+        rows = [answer_index[x] for x in first_scores.index.get_level_values(0)]
+        cols = [SCORE_TO_CODE[x] for x in first_scores.index.get_level_values(1)]
+        rank_table[rows, cols] = by_answer.rank(ascending=False).to_numpy()
+        fraction_table[rows, cols] = (
+            first_scores / by_answer.transform('sum')).to_numpy()
+
+    # (answers, guesses) score codes
+    with stats.stage('pattern_matrix', items=len(answers) * len(short_words)):
+        codes = pattern_matrix(short_words.tolist(), answers).T
+    answer_rows = np.arange(len(answers))[:, None]
+    guess_counts = np.bincount(
+        (answer_rows * NUM_PATTERNS + codes).ravel(),
+        minlength=len(answers) * NUM_PATTERNS).reshape(len(answers), -1)
+
+    with stats.stage('opener_rows', items=codes.size):
+        df_concat = pd.DataFrame(
+            {
+                'score': SCORE_STRINGS[codes.ravel()],
+                'target': np.repeat(answers, len(short_words)),
+                'guess': np.tile(short_words.to_numpy(), len(answers)),
+                'score_frequency_rank': rank_table[answer_rows, codes].ravel(),
+                'score_count_fraction': fraction_table[answer_rows, codes].ravel(),
+            },
+            index=np.tile(np.arange(len(short_words)), len(answers)))
+        df_concat['wordle_num'] = df_concat['target'].map(reverse_map)
+        df_concat['guess_count'] = guess_counts[answer_rows, codes].ravel()
     return df_concat
 
 
-def make_first_guest_list(myzipfile='wordle-tweets.zip'):
+def get_first_words(df):
+    return first_words_from_counts(
+        count_first_scores(df, better_wordle_solutions()))
+
+
+def read_first_score_counts(myzipfile='wordle-tweets.zip',
+                            chunksize=None,
+                            solutions=None,
+                            skip_wordle_nums=None):
+    """count_first_scores of the zipped tweets.csv.
+
+    With chunksize, tweets.csv is read chunksize rows at a time and every chunk is reduced to first score counts
+    before the next is read, so peak memory depends on the chunk size and not the size of the archive. solutions is
+    a solutions.SolutionRegistry, the shared registry by default. Rows whose wordle_id is in skip_wordle_nums are
+    dropped before they are parsed.
+    """
+    solutions = (registry if solutions is None else solutions).to_dict()
     with zipfile.ZipFile(myzipfile) as myzip: #myzipfile can be a string of a file name or Bytes IO
-        tweets = pd.read_csv(myzip.open('tweets.csv'))
-    print(f"Max wordle num {tweets['wordle_id'].max()}")
-    first_guess_list = get_first_words(tweets)
-    freq_map = make_freqs()
-
-    first_guess_list['commonality'] = first_guess_list['guess'].map(freq_map)
-    first_guess_list['weighted_rank'] = (
-        first_guess_list['score_frequency_rank']**2)
+        if chunksize is None:
+            with stats.stage('read_csv') as stage:
+                tweets = pd.read_csv(myzip.open('tweets.csv'))
+                stage.items = len(tweets)
+            print(f"Max wordle num {tweets['wordle_id'].max()}")
+            return count_first_scores(skip_rows(tweets, skip_wordle_nums),
+                                      solutions)
+        counts = {}
+        max_wordle_num = None
+        for chunk in pd.read_csv(myzip.open('tweets.csv'), chunksize=chunksize):
+            chunk_max = chunk['wordle_id'].max()
+            if max_wordle_num is None or chunk_max > max_wordle_num:
+                max_wordle_num = chunk_max
+            merge_counts(
+                counts,
+                count_first_scores(skip_rows(chunk, skip_wordle_nums),
+                                   solutions))
+        print(f"Max wordle num {max_wordle_num}")
+    return counts
+
+
+def skip_rows(tweets, skip_wordle_nums):
+    if not skip_wordle_nums:
+        return tweets
+    return tweets.loc[~tweets['wordle_id'].isin(skip_wordle_nums)].copy()
+
+
+def first_score_checksums(counts, solutions=None):
+    """{answer: (wordle_num, checksum)} of the first score counts behind each answer's rows of the opener table.
+
+    An answer whose checksum is unchanged would produce exactly the same rows again.
+    """
+    reverse_map = (registry if solutions is None else solutions).reverse_dict()
+    by_answer = {}
+    for (answer, score), the_count in counts['first_scores'].items():
+        by_answer.setdefault(answer, []).append((score, int(the_count)))
+    checksums = {}
+    for answer, rows in counts['answers'].items():
+        wordle_num = int(reverse_map[answer])
+        payload = json.dumps(
+            [answer, wordle_num,
+             int(rows), sorted(by_answer.get(answer, []))])
+        checksums[answer] = (wordle_num,
+                             hashlib.sha256(payload.encode()).hexdigest())
+    return checksums
+
+
+def select_answers(counts, answers):
+    """the part of count_first_scores output that belongs to some answers"""
+    answers = set(answers)
+    return {
+        'first_scores': {
+            key: val
+            for key, val in counts['first_scores'].items()
+            if key[0] in answers
+        },
+        'answers':
+        {key: val
+         for key, val in counts['answers'].items() if key in answers},
+        'rows': counts['rows'],
+    }
+
+
+def add_derived_columns(first_guess_list, freq_map=None):
+    if freq_map is None:
+        freq_map = make_freqs()
+
+    with stats.stage('derived_columns', items=len(first_guess_list)):
+        first_guess_list['commonality'] = first_guess_list['guess'].map(
+            freq_map)
+        first_guess_list['weighted_rank'] = (
+            first_guess_list['score_frequency_rank']**2)
     return first_guess_list
+
+
+def make_first_guest_list(myzipfile='wordle-tweets.zip',
+                          chunksize=None,
+                          freq_map=None,
+                          solutions=None):
+    """Opener table from the zipped tweets.csv, see read_first_score_counts for chunksize.
+
+    freq_map ({word: frequency}, make_freqs() by default) and solutions (a solutions.SolutionRegistry) let the
+    table be built without unigram_freq.csv or the configured solution files.
+    """
+    counts = read_first_score_counts(myzipfile, chunksize, solutions=solutions)
+    return add_derived_columns(first_words_from_counts(counts, solutions),
+                               freq_map)
@@ -1,5 +1,5 @@
 from searchtweets import (gen_request_parameters, load_credentials,
-                          collect_results)
+                          collect_results, ResultStream)
 import pandas as pd
 
 search_args = load_credentials("~/.twitter_keys.yaml",
@@ -27,3 +27,16 @@ def get_tweets(wordle_num, max_tweets=3000, return_df=False):
         } for x in all_tweet_text])
     else:
         return all_tweet_text
+
+
+def stream_tweets(wordle_num, max_tweets=3000):
+    """Like get_tweets, but yields the tweet text of each page of results as it arrives so a
+    streaming.StreamingSolver can start before the collection finishes."""
+    query = gen_request_parameters(f"Wordle {wordle_num}",
+                                   granularity=None,
+                                   results_per_call=100)
+    stream = ResultStream(request_parameters=query,
+                          max_tweets=max_tweets,
+                          **search_args)
+    for page in stream.stream():
+        yield [x['text'] for x in page.get('data', [])]
@@ -0,0 +1,178 @@
+"""Parallel ingest of large or sharded tweet dumps.
+
+Tweets are split into shards, every shard is filtered, parsed and reduced to compact per wordle counts in a
+process pool, and the counts are summed in the parent. Integer sums don't depend on the order shards finish in,
+so the merged result is deterministic.
+
+    wordle_counts, wordle_tweet_counts = ingest_tweets(['wordle-tweets.zip'], max_workers=8)
+    t = TwitterWordle.from_pattern_counts(wordle_counts, wordle_tweet_counts)
+
+Shards are read and parsed inside the workers, the parent only hands out where they are. Parquet files are
+sharded by row group. CSVs are sharded into byte ranges of chunksize records: tweet text can hold newlines inside
+quotes, so the parent scans the bytes once and only cuts at a newline with an even number of quote characters
+before it. CSVs inside a zip are first extracted to a temporary file so their byte ranges can be read directly.
+"""
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from TwitterWordle import count_by_wordle, filter_tweets, gather_codes, parse_score_lines
+
+COLUMNS = ['tweet_text', 'wordle_id']
+
+
+def count_patterns(df):
+    """Reduce one shard of tweets to {'patterns': {wordle_id: counts}, 'tweets': {wordle_id: n}}.
+
+    Applies the same filters as the TwitterWordle constructor.
+    """
+    df = df.loc[filter_tweets(df['tweet_text'], df['wordle_id'])]
+    codes, offsets = parse_score_lines(df['tweet_text'])
+    keep = np.flatnonzero(np.diff(offsets) <= 6)
+    codes, offsets = gather_codes(codes, offsets, keep)
+    wordle_ids, tweet_counts, counts = count_by_wordle(
+        df['wordle_id'].to_numpy()[keep], codes, offsets
+    )
+    wordle_ids = wordle_ids.tolist()
+    return {
+        'patterns': dict(zip(wordle_ids, counts)),
+        'tweets': dict(zip(wordle_ids, tweet_counts.tolist())),
+    }
+
+
+def csv_record_ranges(path, chunksize=200_000, block_size=1 << 24):
+    """Yield (start, stop) byte ranges of at most chunksize records each, everything after the header line.
+
+    A newline ends a record only when an even number of quote characters came before it, so quoted newlines in
+    tweet text never split a record. The file is scanned in blocks with numpy, never parsed.
+    """
+    start = None
+    n_records = 0
+    quotes = 0
+    offset = 0
+    with open(path, 'rb') as f:
+        while True:
+            block = np.frombuffer(f.read(block_size), dtype=np.uint8)
+            if not len(block):
+                break
+            quote_pos = np.flatnonzero(block == ord('"'))
+            newline_pos = np.flatnonzero(block == ord('\n'))
+            even = (quotes + np.searchsorted(quote_pos, newline_pos)) % 2 == 0
+            ends = newline_pos[even] + offset + 1
+            quotes += len(quote_pos)
+            offset += len(block)
+            if start is None:
+                if not len(ends):
+                    continue
+                # the first record end closes the header
+                start, ends = int(ends[0]), ends[1:]
+            # record n_records + i + 1 ends at ends[i], every chunksize-th one closes a range
+            for stop in ends[(chunksize - 1 - n_records) % chunksize :: chunksize].tolist():
+                yield start, stop
+                start = stop
+            n_records += len(ends)
+    if start is not None and start < offset:
+        yield start, offset
+
+
+def csv_shards(path, chunksize=200_000):
+    names = pd.read_csv(path, nrows=0).columns.tolist()
+    for start, stop in csv_record_ranges(path, chunksize):
+        yield 'csv', (path, start, stop, names)
+
+
+def iter_shards(paths, chunksize=200_000, tmpdir=None):
+    """Yield shards as ('parquet', (path, row_group)) or ('csv', (path, start, stop, column names)) tuples.
+
+    CSVs inside a zip are extracted to tmpdir, which has to outlive the shards.
+    """
+    for path in paths:
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+
+            for row_group in range(pq.ParquetFile(path).num_row_groups):
+                yield 'parquet', (path, row_group)
+        elif path.endswith('.zip'):
+            if tmpdir is None:
+                raise ValueError('Sharding a zip needs a tmpdir to extract its CSVs to')
+            with zipfile.ZipFile(path) as myzip:
+                for i, name in enumerate(sorted(myzip.namelist())):
+                    if name.endswith('.csv'):
+                        extracted = os.path.join(tmpdir, f'{i}_{os.path.basename(name)}')
+                        with myzip.open(name) as src, open(extracted, 'wb') as dst:
+                            shutil.copyfileobj(src, dst, 1 << 24)
+                        yield from csv_shards(extracted, chunksize)
+        else:
+            yield from csv_shards(path, chunksize)
+
+
+def _load_shard(kind, shard):
+    if kind == 'parquet':
+        import pyarrow.parquet as pq
+
+        path, row_group = shard
+        return pq.ParquetFile(path).read_row_group(row_group, columns=COLUMNS).to_pandas()
+    path, start, stop, names = shard
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(stop - start)
+    return pd.read_csv(io.BytesIO(data), header=None, names=names, usecols=COLUMNS)
+
+
+def _reduce_shard(reducer, kind, shard):
+    return reducer(_load_shard(kind, shard))
+
+
+def merge_counts(total, result):
+    """Add one reducer result into the running total, both {name: {key: count or array}}"""
+    for name, values in result.items():
+        merged = total.setdefault(name, {})
+        for key, val in values.items():
+            merged[key] = merged[key] + val if key in merged else val
+    return total
+
+
+def sorted_counts(total):
+    return {name: dict(sorted(values.items())) for name, values in total.items()}
+
+
+def ingest_shards(paths, reducer=count_patterns, max_workers=None, chunksize=200_000):
+    """Run reducer over every shard of paths in a process pool and merge the results.
+
+    At most two shards per worker are in flight, so memory doesn't grow with the size of the dump.
+    max_workers=1 runs everything in this process.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    total = {}
+    max_workers = max_workers or os.cpu_count()
+    with tempfile.TemporaryDirectory(prefix='ingest_') as tmpdir:
+        shards = iter_shards(paths, chunksize=chunksize, tmpdir=tmpdir)
+        if max_workers == 1:
+            for kind, shard in shards:
+                merge_counts(total, _reduce_shard(reducer, kind, shard))
+            return sorted_counts(total)
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+            for kind, shard in shards:
+                if len(pending) >= 2 * max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        merge_counts(total, future.result())
+                pending.add(executor.submit(_reduce_shard, reducer, kind, shard))
+            for future in wait(pending).done:
+                merge_counts(total, future.result())
+    return sorted_counts(total)
+
+
+def ingest_tweets(paths, max_workers=None, chunksize=200_000):
+    """Per wordle pattern counts and tweet counts for TwitterWordle.from_pattern_counts"""
+    total = ingest_shards(paths, max_workers=max_workers, chunksize=chunksize)
+    return total.get('patterns', {}), total.get('tweets', {})
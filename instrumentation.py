@@ -0,0 +1,124 @@
+"""Per stage wall time, call and item counters for TwitterWordle and the first_word pipeline.
+
+    t = TwitterWordle(df, stats=Stats())
+    t.solve_all()
+    print(t.stats)            # or t.stats.to_dict() / t.stats.to_json()
+
+A disabled Stats (the default) hands out one shared no-op context manager, so instrumented code only pays for a
+method call and an attribute check. profile() runs one call under cProfile, and tracemalloc if asked.
+"""
+import cProfile
+import io
+import json
+import pstats
+import time
+import tracemalloc
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('stats', 'name', 'items', 'start')
+
+    def __init__(self, stats, name, items):
+        self.stats = stats
+        self.name = name
+        self.items = items
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.stats.add(self.name, time.perf_counter() - self.start, self.items)
+        return False
+
+
+class Stats:
+    """Wall time, calls and items processed for each named stage.
+
+    with stats.stage('parse', items=len(df)) as stage:
+        ...
+        stage.items = n  # items can also be set inside the block
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = {}
+
+    def stage(self, name, items=0):
+        if not self.enabled:
+            return NULL_STAGE
+        return _Stage(self, name, items)
+
+    def add(self, name, seconds=0.0, items=0, calls=1):
+        if not self.enabled:
+            return
+        record = self.stages.get(name)
+        if record is None:
+            record = self.stages[name] = {'seconds': 0.0, 'calls': 0, 'items': 0}
+        record['seconds'] += seconds
+        record['calls'] += calls
+        record['items'] += int(items)
+
+    def count(self, name, items=1):
+        """a counter without timing"""
+        self.add(name, 0.0, items, calls=1)
+
+    def reset(self):
+        self.stages = {}
+
+    def to_dict(self):
+        return {name: dict(record) for name, record in self.stages.items()}
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def __repr__(self):
+        if not self.stages:
+            return f'Stats(enabled={self.enabled}, no stages recorded)'
+        lines = [f"{'stage':<24} {'seconds':>10} {'calls':>8} {'items':>12}"]
+        for name, record in self.stages.items():
+            lines.append(
+                f"{name:<24} {record['seconds']:10.4f} {record['calls']:8d} {record['items']:12d}"
+            )
+        return '\n'.join(lines)
+
+
+def profile(func, *args, sort='cumulative', top=25, trace_memory=False, **kwargs):
+    """Run func(*args, **kwargs) under cProfile, returns (result, report).
+
+    report holds the top functions as text, and with trace_memory the peak traced memory in MB and the lines that
+    allocated the most.
+    """
+    if trace_memory:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(func, *args, **kwargs)
+        report = {}
+        if trace_memory:
+            report['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+            snapshot = tracemalloc.take_snapshot()
+            report['top_allocations'] = [str(x) for x in snapshot.statistics('lineno')[:top]]
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(top)
+    report['profile'] = out.getvalue()
+    return result, report
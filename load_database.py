@@ -1,26 +1,56 @@
-import zipfile
-import pandas as pd
-from sqlalchemy import create_engine, types
-from first_word import make_first_guest_list
+import argparse
+from first_word import (add_derived_columns, first_score_checksums,
+                        first_words_from_counts, read_first_score_counts,
+                        select_answers)
+from opener_db import bulk_load, read_checksums, upsert_wordles
 
-if __name__ == "__main__":
-    df = make_first_guest_list()
-    dbc = create_engine('sqlite:///wordle_first_words.db')
-    dtype_dict = {
-        'score': types.TEXT,
-        'target': types.TEXT,
-        'guess': types.INTEGER,
-        'score_frequency_rank': types.FLOAT,
-        'wordle_num': types.INTEGER,
-        'guess_count': types.INTEGER,
-        'commonalitiy': types.INTEGER,
-        'weighted_rank': types.FLOAT,
-    }
 
-    df.to_sql('main',
-              dbc,
-              if_exists='replace',
-              dtype=dtype_dict,
-              index=False,
-              chunksize=10000,
-              method='multi')
+def load_database(myzipfile='wordle-tweets.zip',
+                  path='wordle_first_words.db',
+                  incremental=False,
+                  chunksize=None):
+    """Build the opener table in path from the zipped tweets.
+
+    With incremental, only the tweets of wordles that the last load did not record, and of the newest one it did
+    (which may still have been collecting tweets), are parsed. Rows are only computed and written for those of
+    their answers whose first score counts changed since the last load, or that are new.
+    """
+    if not incremental:
+        counts = read_first_score_counts(myzipfile, chunksize)
+        df = add_derived_columns(first_words_from_counts(counts))
+        bulk_load(df, path, checksums=first_score_checksums(counts))
+        return
+    stored = read_checksums(path)
+    loaded = {wordle_num for wordle_num, _ in stored.values()}
+    counts = read_first_score_counts(
+        myzipfile,
+        chunksize,
+        skip_wordle_nums=loaded - {max(loaded)} if loaded else None)
+    checksums = first_score_checksums(counts)
+    changed = [
+        answer for answer, checksum in checksums.items()
+        if tuple(stored.get(answer, ())) != checksum
+    ]
+    print(f"{len(changed)} of {len(checksums)} wordles are new or changed")
+    if not changed:
+        return
+    df = add_derived_columns(
+        first_words_from_counts(select_answers(counts, changed)))
+    upsert_wordles(df, {answer: checksums[answer] for answer in changed}, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description='Load the wordle opener table')
+    parser.add_argument('--zipfile', default='wordle-tweets.zip')
+    parser.add_argument('--db', default='wordle_first_words.db')
+    parser.add_argument('--chunksize', type=int, default=None)
+    parser.add_argument('--incremental',
+                        action='store_true',
+                        help='only update new or changed wordles',
+                        default=False)
+    args = parser.parse_args()
+    load_database(args.zipfile,
+                  args.db,
+                  incremental=args.incremental,
+                  chunksize=args.chunksize)
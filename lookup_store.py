@@ -0,0 +1,133 @@
+"""Versioned binary format for the pre-computed lookup dictionaries.
+
+Parsing zipped_counters_nyt_2022_02_15.json or unpickling zipped_counters_allwords_nyt.pickle happens in every new
+process. This converts them once into a directory of .npy arrays holding the ScoreMatrix as it is used: target
+words, the dense weights and possible pattern matrices, the pattern bitsets and the default penalties. They load
+with mmap and ScoreMatrix uses them without a copy, so nothing is parsed or expanded at startup and processes share
+the pages. meta.json records the format version and a SHA256 of the source file, so an artifact left behind after
+the source changes is detected as stale and rebuilt.
+
+    python lookup_store.py zipped_counters_nyt_2022_02_15.json zipped_counters_allwords_nyt.pickle
+"""
+import hashlib
+import json
+import os
+import pickle
+import sys
+
+import numpy as np
+
+from score_matrix import ScoreMatrix
+
+FORMAT_VERSION = 2
+ARRAY_NAMES = ('words', 'weights', 'possible', 'bitsets', 'std_penalty')
+
+
+def lookup_path(source):
+    return os.path.splitext(source)[0] + '.lookup'
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def read_zipped_counters(source):
+    """The original list of (target_word, {score_line: weight}) pairs from a json or pickle file"""
+    if source.endswith('.json'):
+        with open(source, 'r') as f:
+            return json.load(f)
+    with open(source, 'rb') as f:
+        return pickle.load(f)
+
+
+def save_lookup(score_matrix, path, source=None):
+    """Write score_matrix as .npy arrays. meta.json is written last, so a partial write is never loaded."""
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    arrays = {
+        'words': score_matrix.words.astype('U5'),
+        'weights': score_matrix.weights,
+        'possible': score_matrix.possible,
+        'bitsets': score_matrix.bitsets,
+        'std_penalty': score_matrix.std_penalty,
+    }
+    for name, arr in arrays.items():
+        np.save(os.path.join(path, f'{name}.npy'), arr)
+
+    meta = {'format_version': FORMAT_VERSION, 'n_targets': len(score_matrix), 'source': None}
+    if source is not None:
+        stat = os.stat(source)
+        meta['source'] = {
+            'name': os.path.basename(source),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_sha256(source),
+        }
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=4)
+
+
+def is_stale(meta, source):
+    """True if the artifact was built by another format version or from a different source file."""
+    if meta.get('format_version') != FORMAT_VERSION:
+        return True
+    if source is None or not os.path.exists(source):
+        # nothing to compare to, e.g. only the artifact was shipped
+        return False
+    recorded = meta.get('source')
+    if not recorded:
+        return True
+    stat = os.stat(source)
+    if stat.st_size == recorded['size'] and stat.st_mtime_ns == recorded['mtime_ns']:
+        return False
+    return file_sha256(source) != recorded['sha256']
+
+
+def load_lookup(path, source=None, mmap_mode='r'):
+    """Load a ScoreMatrix from path, or None if the artifact is missing or stale compared to source."""
+    meta_path = os.path.join(path, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r') as f:
+        meta = json.load(f)
+    if is_stale(meta, source):
+        print(f'Lookup artifact {path} is stale.')
+        return None
+    arrays = {
+        name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+        for name in ARRAY_NAMES
+    }
+    return ScoreMatrix(**arrays)
+
+
+def convert(source, path=None):
+    """Convert a json/pickle lookup file to the binary format and return the ScoreMatrix"""
+    path = path or lookup_path(source)
+    score_matrix = ScoreMatrix.from_zipped_counters(read_zipped_counters(source))
+    save_lookup(score_matrix, path, source=source)
+    return score_matrix
+
+
+def load_or_convert(source):
+    """Load the binary artifact for source, (re)building it first if it is missing or stale."""
+    score_matrix = load_lookup(lookup_path(source), source=source)
+    if score_matrix is not None:
+        return score_matrix
+    score_matrix = ScoreMatrix.from_zipped_counters(read_zipped_counters(source))
+    try:
+        save_lookup(score_matrix, lookup_path(source), source=source)
+    except OSError as e:
+        print(f'Could not write lookup artifact for {source}: {e}')
+    return score_matrix
+
+
+if __name__ == '__main__':
+    for source in sys.argv[1:]:
+        convert(source)
+        print(f'Wrote {lookup_path(source)}')
@@ -0,0 +1,330 @@
+"""Indexed, parameterized queries on the opener table in wordle_first_words.db.
+
+load_database.py writes the `main` table and then calls create_indexes. The dashboard reads through an OpenerDB,
+which hands out read-only sqlite3 connections from a small pool. Every query uses ? parameters, so each connection's
+statement cache keeps the prepared statements instead of planning a new f-string query on every callback.
+
+Query results are kept in a bounded LRU ResponseCache, which the dashboard also uses for its figure json. The cache
+empties itself when the database file is rebuilt.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+
+DB_PATH = 'wordle_first_words.db'
+
+# name -> columns, each covers the columns its dashboard query reads
+INDEXES = {
+    'main_guess': ('guess', 'score', 'score_frequency_rank'),
+    'main_score_wordle_num': ('score', 'wordle_num', 'commonality', 'guess'),
+    'main_wordle_num_guess_count': (
+        'wordle_num',
+        'guess_count',
+        'score',
+        'guess',
+        'weighted_rank',
+    ),
+}
+
+MEAN_RANK = "select avg(score_frequency_rank) from main where guess = ? and score <> '00000'"
+GUESS_ROWS = 'select * from main where guess = ?'
+PATTERN_GUESSES = (
+    'select guess, commonality from main where score = ? and wordle_num = ? and commonality > 0 '
+    'order by commonality desc'
+)
+LEADERS = """select guess, avg(weighted_rank) as weighted_rank_mean, count(weighted_rank) as weighted_rank_count
+from main where score <> '00000' and guess_count <= ? and wordle_num between ? and ?
+group by guess having weighted_rank_count >= ? order by weighted_rank_mean limit 25"""
+
+
+def create_indexes(con):
+    """Create the covering indexes on main, and the statistics the query planner uses to pick them."""
+    for name, columns in INDEXES.items():
+        con.execute(f'create index if not exists {name} on main ({", ".join(columns)})')
+    con.execute('analyze main')
+    con.commit()
+
+
+def normalize_key(value):
+    """Hashable cache key for callback inputs, e.g. [1, 2.0] and (1, 2) give the same key"""
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize_key(x) for x in value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+LOAD_PRAGMAS = {
+    # only takes effect while the file is still empty
+    'page_size': 8192,
+    # a failed load leaves the old table, the new rows go to a separate table that is swapped in at the end
+    'journal_mode': 'MEMORY',
+    'synchronous': 'OFF',
+    'cache_size': -262144,
+    'temp_store': 'MEMORY',
+}
+
+
+def sql_type(dtype):
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+
+def column_definitions(df):
+    return ', '.join(f'"{name}" {sql_type(dtype)}' for name, dtype in df.dtypes.items())
+
+
+def insert_frame(con, table, df, batch_size=100_000):
+    insert = f'insert into {table} values ({", ".join("?" * df.shape[1])})'
+    for i in range(0, len(df), batch_size):
+        chunk = df.iloc[i : i + batch_size]
+        # plain python values, sqlite3 can't bind numpy scalars. NaN is stored as NULL like to_sql does
+        con.executemany(insert, zip(*(chunk[name].tolist() for name in df.columns)))
+
+
+def bulk_load(df, path=DB_PATH, table='main', checksums=None):
+    """Replace table with the rows of df in one transaction, then build the indexes.
+
+    The rows go into a new table with executemany and the old table is only dropped once they are all in, so the
+    dashboard never sees a half loaded table. The load_meta table is dropped in the same transaction and, if
+    checksums are given, rewritten from them (see upsert_wordles). Returns rows per second.
+    """
+    start = time.perf_counter()
+    load_table = f'{table}__load'
+    con = sqlite3.connect(path, isolation_level=None)
+    try:
+        for key, value in LOAD_PRAGMAS.items():
+            con.execute(f'pragma {key} = {value}')
+        con.execute('begin')
+        con.execute(f'drop table if exists {load_table}')
+        con.execute(f'create table {load_table} ({column_definitions(df)})')
+        insert_frame(con, load_table, df)
+        con.execute(f'drop table if exists {table}')
+        con.execute(f'alter table {load_table} rename to {table}')
+        # a full load replaces every wordle, checksums recorded for the old table no longer describe it
+        con.execute('drop table if exists load_meta')
+        if checksums is not None:
+            write_checksums(con, checksums)
+        create_indexes(con)
+    except BaseException:
+        if con.in_transaction:
+            con.execute('rollback')
+        raise
+    finally:
+        con.close()
+    elapsed = time.perf_counter() - start
+    print(f'Loaded {len(df)} rows into {path} in {elapsed:.1f}s, {len(df) / elapsed:,.0f} rows/s')
+    return len(df) / elapsed
+
+
+def write_checksums(con, checksums):
+    """Record {target: (wordle_num, checksum)} of the rows now in main"""
+    con.execute(
+        'create table if not exists load_meta '
+        '(target TEXT PRIMARY KEY, wordle_num INTEGER, checksum TEXT, loaded_at REAL)'
+    )
+    now = time.time()
+    con.executemany(
+        'insert or replace into load_meta values (?, ?, ?, ?)',
+        [(target, wordle_num, checksum, now) for target, (wordle_num, checksum) in checksums.items()],
+    )
+
+
+def read_checksums(path=DB_PATH):
+    """{target: (wordle_num, checksum)} recorded by the last load, empty if there is no database or meta table"""
+    if not os.path.exists(path):
+        return {}
+    with sqlite3.connect(f'file:{path}?mode=ro', uri=True) as con:
+        try:
+            rows = con.execute('select target, wordle_num, checksum from load_meta').fetchall()
+        except sqlite3.OperationalError:
+            return {}
+    return {target: (wordle_num, checksum) for target, wordle_num, checksum in rows}
+
+
+def upsert_wordles(df, checksums, path=DB_PATH, table='main'):
+    """Replace the rows of the targets in df, and nothing else, in one transaction.
+
+    Rows are found by wordle_num, both the one in df and the one load_meta recorded, in case a repeated answer
+    moved to a newer wordle number. The indexes are updated with the rows, and pragma optimize refreshes the
+    planner statistics only if the change is big enough to matter.
+    """
+    start = time.perf_counter()
+    stored = read_checksums(path)
+    wordle_nums = {wordle_num for wordle_num, _ in checksums.values()}
+    wordle_nums.update(stored[target][0] for target in checksums if target in stored)
+    con = sqlite3.connect(path, isolation_level=None)
+    try:
+        con.execute('pragma synchronous = OFF')
+        con.execute('begin')
+        con.execute(f'create table if not exists {table} ({column_definitions(df)})')
+        con.executemany(
+            f'delete from {table} where wordle_num = ?', [(int(x),) for x in wordle_nums]
+        )
+        insert_frame(con, table, df)
+        write_checksums(con, checksums)
+        con.execute('commit')
+        for name, columns in INDEXES.items():
+            con.execute(f'create index if not exists {name} on {table} ({", ".join(columns)})')
+        con.execute('pragma optimize')
+    except BaseException:
+        if con.in_transaction:
+            con.execute('rollback')
+        raise
+    finally:
+        con.close()
+    elapsed = time.perf_counter() - start
+    print(f'Upserted {len(df)} rows for {len(checksums)} wordles into {path} in {elapsed:.1f}s')
+
+
+class ResponseCache:
+    """Bounded LRU cache of callback results, cleared whenever version_func() returns something new.
+
+    DataFrames are copied on the way in and out, so callers can add columns to what they get back.
+    """
+
+    def __init__(self, version_func, maxsize=256):
+        self.version_func = version_func
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _check_version(self):
+        version = self.version_func()
+        if version != self.version:
+            self.data.clear()
+            self.version = version
+
+    def get_or_compute(self, key, func):
+        key = normalize_key(key)
+        with self.lock:
+            self._check_version()
+            if key in self.data:
+                self.hits += 1
+                self.data.move_to_end(key)
+                return _copy(self.data[key])
+            self.misses += 1
+            version = self.version
+        value = func()
+        with self.lock:
+            self._check_version()
+            if self.version != version:
+                # the database was rebuilt while func ran, value may come from the old file
+                return value
+            self.data[key] = _copy(value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else None,
+                'size': len(self.data),
+                'maxsize': self.maxsize,
+            }
+
+
+def _copy(value):
+    return value.copy() if isinstance(value, pd.DataFrame) else value
+
+
+class OpenerDB:
+    """Pool of read-only connections to the opener database, with one method per dashboard query."""
+
+    def __init__(self, path=DB_PATH, pool_size=4, cache_size=256):
+        self.path = path
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+        self.cache = ResponseCache(self.version, maxsize=cache_size)
+        self._version = None
+
+    def version(self):
+        """Changes whenever the database file is rewritten, pooled connections to an older file are closed"""
+        try:
+            stat = os.stat(self.path)
+            version = stat.st_mtime_ns, stat.st_size, stat.st_ino
+        except OSError:
+            version = None
+        if version != self._version:
+            self.close()
+            self._version = version
+        return version
+
+    def _connect(self):
+        # check_same_thread=False since the pool hands connections to whichever callback thread asks next
+        return sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, check_same_thread=False)
+
+    @contextmanager
+    def connection(self):
+        try:
+            con = self.pool.get_nowait()
+        except queue.Empty:
+            con = self._connect()
+        try:
+            yield con
+        finally:
+            try:
+                self.pool.put_nowait(con)
+            except queue.Full:
+                con.close()
+
+    def read(self, sql, params=()):
+        def run():
+            with self.connection() as con:
+                return pd.read_sql(sql, con, params=params)
+
+        return self.cache.get_or_compute(('read', sql, params), run)
+
+    def scalar(self, sql, params=()):
+        def run():
+            with self.connection() as con:
+                return con.execute(sql, params).fetchone()[0]
+
+        return self.cache.get_or_compute(('scalar', sql, params), run)
+
+    def close(self):
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def distinct(self, column):
+        """sorted distinct values of a column, column names can't be parameters so only known ones are allowed"""
+        assert column in ('guess', 'wordle_num'), column
+        with self.connection() as con:
+            return [x[0] for x in con.execute(f'select distinct {column} from main order by {column}')]
+
+    def mean_rank(self, guess):
+        return self.scalar(MEAN_RANK, (guess,))
+
+    def guess_rows(self, guess):
+        return self.read(GUESS_ROWS, (guess,))
+
+    def pattern_guesses(self, score, wordle_num):
+        return self.read(PATTERN_GUESSES, (score, int(wordle_num)))
+
+    def leaders(self, max_guess_count, wmin, wmax, min_data_count):
+        return self.read(
+            LEADERS, (max_guess_count, int(wmin), int(wmax), min_data_count)
+        )
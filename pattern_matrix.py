@@ -0,0 +1,149 @@
+"""Vectorized replacement for helper.get_num_line/helper_func.
+
+Computes the whole guess x target score pattern matrix with numpy, as base 3 codes (see score_matrix.ALL_SCORES),
+and builds the lookup dictionaries from it in seconds on one core instead of one get_num_line call per pair.
+
+    python pattern_matrix.py
+
+rebuilds zipped_counters_nyt_2022_02_15.json and zipped_counters_allwords_nyt.pickle like the
+`Create Lookup dictionary` notebook does.
+"""
+import hashlib
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from score_matrix import ALL_SCORES, NUM_PATTERNS, ScoreMatrix
+
+
+def read_words(path):
+    return pd.read_csv(path, header=None)[0].tolist()
+
+
+def encode_words(words):
+    """(n, 5) array of letter codes 0-25"""
+    arr = np.ascontiguousarray(np.asarray(words, dtype='U5'))
+    return (arr.view(np.uint32).reshape(-1, 5) - ord('a')).astype(np.int8)
+
+
+def _letter_structure(letters):
+    """For each position, the positions of the word holding the same letter, e.g. 'geese' -> ((0,), (1, 2, 4), ...)"""
+    return tuple(tuple(j for j in range(5) if letters[j] == letters[i]) for i in range(5))
+
+
+def _score_batch(guesses, targets, target_letter_counts, structure):
+    """Score a batch of guesses that share one letter structure against every target."""
+    green = [(guesses[:, i][:, None] == targets[:, i][None, :]).view(np.uint8) for i in range(5)]
+    codes = np.zeros(green[0].shape, dtype=np.uint8)
+    for i, same_letter in enumerate(structure):
+        letter_count = target_letter_counts[guesses[:, i]]
+        if len(same_letter) == 1:
+            yellow = (1 - green[i]) & (letter_count > 0)
+        else:
+            # copies of this letter left in the answer once the greens are taken out
+            available = letter_count - sum(green[j] for j in same_letter)
+            # earlier non-green guesses of the same letter use those copies up first, same as get_num_line
+            used = sum((1 - green[j] for j in same_letter if j < i), np.zeros_like(available))
+            yellow = (1 - green[i]) & (used < available)
+        codes += green[i] * np.uint8(2 * 3 ** (4 - i)) + yellow * np.uint8(3 ** (4 - i))
+    return codes
+
+
+def pattern_matrix(guesses, targets, batch_size=32):
+    """uint8 matrix of score pattern codes, rows are guesses and columns are targets.
+
+    Duplicate letters are scored exactly like helper.get_num_line.
+    """
+    guess_letters = encode_words(guesses)
+    target_letters = encode_words(targets)
+    # (26, targets) count of each letter in each target
+    target_letter_counts = np.stack(
+        [(target_letters == letter).sum(axis=1, dtype=np.int8) for letter in range(26)]
+    )
+    structures = {}
+    for row, letters in enumerate(guess_letters.tolist()):
+        structures.setdefault(_letter_structure(letters), []).append(row)
+
+    out = np.empty((len(guess_letters), len(target_letters)), dtype=np.uint8)
+    for structure, rows in structures.items():
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start : start + batch_size]
+            out[batch] = _score_batch(
+                guess_letters[batch], target_letters, target_letter_counts, structure
+            )
+    return out
+
+
+def load_pattern_matrix(guesses, targets, cache_dir='.'):
+    """pattern_matrix cached on disk, keyed on the word lists so a dictionary change gets a new file."""
+    key = hashlib.sha256(('\n'.join(guesses) + '|' + '\n'.join(targets)).encode()).hexdigest()[:12]
+    path = os.path.join(cache_dir, f'pattern_matrix_{key}.npy')
+    if os.path.exists(path):
+        return np.load(path, mmap_mode='r')
+    matrix = pattern_matrix(guesses, targets)
+    np.save(path, matrix)
+    return matrix
+
+
+def pattern_weights(matrix, guess_weights, batch_size=512):
+    """For every target column, sum guess_weights by score pattern and count the guesses making each pattern.
+
+    Returns two (targets, 243) arrays. This is process_result2 for all targets at once.
+    """
+    guess_weights = np.asarray(guess_weights, dtype=np.float64)
+    n_targets = matrix.shape[1]
+    weights = np.empty((n_targets, NUM_PATTERNS))
+    counts = np.empty((n_targets, NUM_PATTERNS), dtype=np.int64)
+    for start in range(0, n_targets, batch_size):
+        # copy a block of target columns into rows so each bincount reads contiguous memory
+        block = np.ascontiguousarray(np.asarray(matrix[:, start : start + batch_size]).T)
+        for i, column in enumerate(block, start=start):
+            weights[i] = np.bincount(column, weights=guess_weights, minlength=NUM_PATTERNS)
+            counts[i] = np.bincount(column, minlength=NUM_PATTERNS)
+    return weights, counts
+
+
+def make_score_matrix(targets, freqs, guesses, matrix=None):
+    """ScoreMatrix for targets built straight from the pattern matrix."""
+    if matrix is None:
+        matrix = pattern_matrix(guesses, targets)
+    weights, counts = pattern_weights(matrix, [freqs.get(x, 0) for x in guesses])
+    return ScoreMatrix(targets, weights, counts > 0)
+
+
+def make_zipped_counters(targets, freqs, guesses, matrix=None):
+    """Same list of (target, {score: summed frequency}) pairs that mapping helper_func over targets returns."""
+    score_matrix = make_score_matrix(targets, freqs, guesses, matrix=matrix)
+    return [
+        (
+            str(word),
+            {
+                ALL_SCORES[code]: int(score_matrix.weights[i, code])
+                for code in np.flatnonzero(score_matrix.possible[i])
+            },
+        )
+        for i, word in enumerate(score_matrix.words)
+    ]
+
+
+if __name__ == '__main__':
+    from helper import make_freqs
+
+    all_words = read_words('wordle-dictionary-full.txt')
+    target_words = read_words('wordle-targets_2022-02-15.txt')
+    freqs = make_freqs()
+    matrix = load_pattern_matrix(all_words, all_words)
+    target_columns = [all_words.index(x) for x in target_words]
+
+    zipped_counters = make_zipped_counters(
+        target_words, freqs, all_words, matrix=matrix[:, target_columns]
+    )
+    json.dump(zipped_counters, open('zipped_counters_nyt_2022_02_15.json', 'w'), indent=4)
+
+    # some true answers score 0 in the frequency data, so the full list uses a non-zero minimum
+    new_freqs = {key: max(val, 12716) for key, val in freqs.items()}
+    zipped_counters_full_list = make_zipped_counters(all_words, new_freqs, all_words, matrix=matrix)
+    pickle.dump(zipped_counters_full_list, open('zipped_counters_allwords_nyt.pickle', 'wb'))
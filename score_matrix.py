@@ -0,0 +1,208 @@
+import numpy as np
+
+NUM_PATTERNS = 243
+PATTERN_PLACES = 3 ** np.arange(4, -1, -1)
+ALL_SCORES = [np.base_repr(i, 3).zfill(5) for i in range(NUM_PATTERNS)]
+SCORE_TO_CODE = {score: code for code, score in enumerate(ALL_SCORES)}
+SCORE_STRINGS = np.array(ALL_SCORES)
+# 243 pattern bits fit in four 64 bit words, pattern code c is bit c % 64 of word c // 64
+BITSET_WORDS = 4
+POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def encode_digits(digits):
+    """Turn a flat array of score digits (0, 1, 2), five per score line, into base 3 pattern codes (0-242)."""
+    return (np.asarray(digits, dtype=np.int64).reshape(-1, 5) @ PATTERN_PLACES).astype(np.uint8)
+
+
+def encode_scores(scores):
+    """Turn an iterable of score line strings like '20110' into an array of base 3 pattern codes (0-242)."""
+    arr = np.ascontiguousarray(np.asarray(scores, dtype='U5'))
+    return encode_digits(arr.view(np.uint32) - ord('0'))
+
+
+def decode_scores(codes):
+    """list of score line strings for an array of pattern codes"""
+    return SCORE_STRINGS[codes].tolist()
+
+
+def drop_solved_lines(counts, exclude_misses=False):
+    """Copy of a pattern count vector (or a stack of them) without the solved 22222 line, and without 00000 too if
+    exclude_misses."""
+    counts = np.array(counts)
+    counts[..., SCORE_TO_CODE['22222']] = 0
+    if exclude_misses:
+        counts[..., SCORE_TO_CODE['00000']] = 0
+    return counts
+
+
+def counter_to_vector(c):
+    """Turn a Counter of score line strings into a dense vector of counts indexed by pattern code."""
+    counts = np.zeros(NUM_PATTERNS, dtype=np.int64)
+    for score, the_count in c.items():
+        counts[SCORE_TO_CODE[score]] = the_count
+    return counts
+
+
+def pack_patterns(possible):
+    """Pack a (rows, 243) boolean pattern mask into (rows, BITSET_WORDS) uint64 bitsets."""
+    possible = np.asarray(possible, dtype=bool).reshape(-1, NUM_PATTERNS)
+    padded = np.zeros((len(possible), BITSET_WORDS * 64), dtype=bool)
+    padded[:, :NUM_PATTERNS] = possible
+    return np.packbits(padded, axis=1, bitorder='little').view('<u8')
+
+
+def _popcount(words):
+    """set bits of every uint64 in words, as uint8"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    return POPCOUNT_TABLE[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+def shared_pattern_counts(bitsets, selected_bits, chunk=64):
+    """(len(selected_bits), len(bitsets)) uint8 counts of the pattern bits each selected row shares with each
+    bitset row, i.e. possible @ selected for 0/1 masks without a float copy of possible."""
+    bitsets = np.ascontiguousarray(bitsets.T)
+    out = np.zeros((len(selected_bits), bitsets.shape[1]), dtype=np.uint8)
+    for start in range(0, len(selected_bits), chunk):
+        block = out[start : start + chunk]
+        for word in range(BITSET_WORDS):
+            block += _popcount(bitsets[word][None, :] & selected_bits[start : start + chunk, word, None])
+    return out
+
+
+def has_pattern(bitsets, rows, codes):
+    """Boolean array, True where bitset row rows[i] has the bit for pattern code codes[i] set."""
+    codes = np.asarray(codes, dtype=np.uint64)
+    words = bitsets[rows, (codes >> np.uint64(6)).astype(np.intp)]
+    return ((words >> (codes & np.uint64(63))) & np.uint64(1)).astype(bool)
+
+
+def summarize_scores(sums):
+    """Normalize raw target scores like solve_guess_list does and find the leader, along the last axis.
+
+    Works on any number of leading (batch) axes. Returns (normalized scores, leader index, sigma, delta above the
+    runner up). The runner up comes from a partial partition, the scores are never fully sorted.
+    """
+    res = sums / sums.mean(axis=-1, keepdims=True) - 1
+    leader = res.argmax(axis=-1)
+    best = np.take_along_axis(res, leader[..., None], axis=-1)[..., 0]
+    runner_up = np.partition(res, -2, axis=-1)[..., -2]
+    return res, leader, best / res.std(axis=-1, ddof=1), best / runner_up
+
+
+class ScoreMatrix:
+    """The pre-computed lookup dictionaries held as a dense targets x 243 score pattern matrix.
+
+    weights[i, code] is the summed word frequency of every guess that makes pattern code for target words[i].
+    possible[i, code] is False when no guess can make that pattern for the target, these are the patterns that
+    get the penalty term in process_counter. bitsets packs possible into four uint64 words per target.
+    """
+
+    def __init__(self, words, weights, possible, bitsets=None, std_penalty=None):
+        """Arrays that already have the right dtype are used as they are, not copied, so memory mapped arrays stay
+        memory mapped. bitsets and std_penalty are derived from weights and possible unless they are given."""
+        self.words = np.asarray(words)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.possible = np.asarray(possible, dtype=bool)
+        self.bitsets = pack_patterns(self.possible) if bitsets is None else np.asarray(bitsets)
+        self.word_index = {word: i for i, word in enumerate(self.words.tolist())}
+        if std_penalty is None:
+            # default penalty of process_counter, -0.5 std of each target dictionary's values
+            n_possible = self.possible.sum(axis=1)
+            mean = self.weights.sum(axis=1) / n_possible
+            variance = (((self.weights - mean[:, None]) ** 2) * self.possible).sum(axis=1) / n_possible
+            std_penalty = -np.sqrt(variance) * 0.5
+        self.std_penalty = np.asarray(std_penalty, dtype=np.float64)
+
+    @classmethod
+    def from_zipped_counters(cls, zipped_counters):
+        """Build from an iterable of (target_word, {score_line: weight}) pairs"""
+        zipped_counters = list(zipped_counters)
+        weights = np.zeros((len(zipped_counters), NUM_PATTERNS))
+        possible = np.zeros((len(zipped_counters), NUM_PATTERNS), dtype=bool)
+        for i, (_, target_dictionary) in enumerate(zipped_counters):
+            codes = [SCORE_TO_CODE[x] for x in target_dictionary]
+            weights[i, codes] = list(target_dictionary.values())
+            possible[i, codes] = True
+        return cls([x[0] for x in zipped_counters], weights, possible)
+
+    def target_dictionary(self, word):
+        """The original {score_line: weight} lookup dictionary for one target word"""
+        i = self.word_index[word]
+        codes = np.flatnonzero(self.possible[i])
+        return {ALL_SCORES[code]: self.weights[i, code].item() for code in codes}
+
+    def to_dict(self):
+        return {str(word): self.target_dictionary(word) for word in self.words}
+
+    def __len__(self):
+        return len(self.words)
+
+    def weight_sums(self, selected):
+        return selected @ self.weights.T
+
+    def pattern_sums(self, selected):
+        """(summed weights, count of impossible patterns) of the selected patterns for every target.
+
+        selected is a 0/1 mask with the 243 patterns on its last axis and any leading (batch) axes, the results have
+        the targets on their last axis instead. The impossible count needs no matrix of its own, it is
+        selected.sum() - possible @ selected with the possible part counted from the bitsets.
+        """
+        flat = selected.reshape(-1, NUM_PATTERNS)
+        possible_sums = shared_pattern_counts(self.bitsets, pack_patterns(flat))
+        impossible_sums = flat.sum(axis=1)[:, None] - possible_sums
+        return (
+            self.weight_sums(selected),
+            impossible_sums.reshape(selected.shape[:-1] + (len(self.words),)),
+        )
+
+    def score(self, counts, min_count=3, penalty_term=-5e7):
+        """Vectorized process_counter for every target at once.
+
+        counts is a vector of how often each pattern code was tweeted. Every pattern seen at least min_count times
+        adds its weight for a target, or the penalty term if the target can't make it.
+        """
+        selected = ((counts >= min_count) & (counts > 0)).astype(np.float64)
+        if not penalty_term:
+            penalty_term = self.std_penalty
+        weight_sums, impossible_sums = self.pattern_sums(selected)
+        return weight_sums + penalty_term * impossible_sums
+
+    def pattern_scores(self, codes, penalty_term=-5e7):
+        """score contribution of a set of selected pattern codes, only touching those columns"""
+        if not penalty_term:
+            penalty_term = self.std_penalty
+        impossible_sums = len(codes) - self.possible[:, codes].sum(axis=1)
+        return self.weights[:, codes].sum(axis=1) + penalty_term * impossible_sums
+
+    def batch_scores(self, counts, min_count=3, penalty_term=-5e7):
+        """score for a stack of count vectors at once, shape (len(counts), targets).
+
+        min_count is one threshold for every row or an array with one per row.
+        """
+        counts = np.asarray(counts)
+        min_count = np.asarray(min_count, dtype=np.float64).reshape(-1, 1)
+        selected = ((counts >= min_count) & (counts > 0)).astype(np.float64)
+        if not penalty_term:
+            penalty_term = self.std_penalty
+        weight_sums, impossible_sums = self.pattern_sums(selected)
+        return weight_sums + penalty_term * impossible_sums
+
+    def grid_scores(self, counts, min_counts, penalty_terms):
+        """score for every (min_count, penalty_term) combination at once, shape (min_counts, penalty_terms, targets).
+
+        The weight and impossible pattern sums only depend on min_count, so they are worked out once and shared by
+        every penalty term. A falsy penalty term uses the per target default like score does.
+        """
+        min_counts = np.asarray(min_counts)
+        selected = ((counts[None, :] >= min_counts[:, None]) & (counts > 0)).astype(np.float64)
+        weight_sums, impossible_sums = self.pattern_sums(selected)
+        # a falsy term is a vector of per target penalties, so broadcast the numbers to that shape too
+        penalties = np.stack(
+            [
+                np.broadcast_to(np.asarray(p if p else self.std_penalty, dtype=np.float64), len(self.words))
+                for p in penalty_terms
+            ]
+        )
+        return weight_sums[:, None, :] + penalties[None, :, :] * impossible_sums[:, None, :]
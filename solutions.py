@@ -0,0 +1,100 @@
+"""Known wordle solutions by number, loaded once and shared.
+
+The registry reads config.wordle_solution_file_path (the original solution list, one word per line) and
+../wordle_public/better_history.json, then applies a few manual corrections. Both files are only parsed again when
+their modification time changes, so importing modules and repeated lookups don't reparse them.
+"""
+import os
+
+import pandas as pd
+
+HISTORY_PATH = '../wordle_public/better_history.json'
+CORRECTIONS = {
+    335: 'gamer',
+    401: 'elope',
+    402: 'cinch',
+    420: 'hunky',
+    361: 'atone',
+    365: 'cacao',
+    368: 'gloat',
+    370: 'brink',
+    386: 'stead',
+    388: 'madam',
+}
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class SolutionRegistry:
+    """number -> word and word -> number lookups of wordle solutions, reloaded when a source file changes.
+
+    A word that was the answer more than once maps back to its last number, like the reverse of the dictionary.
+    """
+
+    def __init__(self, solution_file=None, history_file=HISTORY_PATH, corrections=CORRECTIONS):
+        self._solution_file = solution_file
+        self.history_file = history_file
+        self.corrections = dict(corrections)
+        self._signature = None
+        self._by_number = {}
+        self._by_word = {}
+
+    @property
+    def solution_file(self):
+        if self._solution_file is None:
+            # config is only needed once solutions are looked up, not to import this module
+            import config
+
+            self._solution_file = config.wordle_solution_file_path
+        return self._solution_file
+
+    def _load(self):
+        signature = (_mtime(self.solution_file), _mtime(self.history_file))
+        if signature == self._signature:
+            return
+        by_number = dict(enumerate(pd.read_csv(self.solution_file, header=None)[0].tolist()))
+        if signature[1] is not None:
+            history = pd.read_json(self.history_file)
+            by_number.update(history.set_index('wordle_num')['word'].to_dict())
+        by_number.update(self.corrections)
+        self._by_number = by_number
+        self._by_word = {val: key for key, val in by_number.items()}
+        self._signature = signature
+
+    def word(self, wordle_num, default=None):
+        self._load()
+        return self._by_number.get(wordle_num, default)
+
+    def number(self, word, default=None):
+        self._load()
+        return self._by_word.get(word, default)
+
+    def to_dict(self):
+        """copy of the {wordle_num: word} dictionary"""
+        self._load()
+        return dict(self._by_number)
+
+    def reverse_dict(self):
+        """copy of the {word: wordle_num} dictionary"""
+        self._load()
+        return dict(self._by_word)
+
+    def __getitem__(self, wordle_num):
+        self._load()
+        return self._by_number[wordle_num]
+
+    def __contains__(self, wordle_num):
+        self._load()
+        return wordle_num in self._by_number
+
+    def __len__(self):
+        self._load()
+        return len(self._by_number)
+
+
+registry = SolutionRegistry()
@@ -0,0 +1,120 @@
+"""Solve a wordle from tweets as they arrive instead of waiting for the whole collection.
+
+    solver = StreamingSolver(TwitterWordle(), 341)
+    for page in stream_tweets(341):
+        status = solver.add_tweets(page)
+        if solver.done:
+            break
+
+Pattern counts only grow, so a score pattern crosses min_count at most once. When it does its column is added to
+the running score vector, which keeps every update exact and proportional to the new patterns, not the history.
+"""
+import numpy as np
+import pandas as pd
+
+from score_matrix import NUM_PATTERNS, drop_solved_lines, summarize_scores
+from TwitterWordle import filter_tweets, gather_codes, parse_score_lines
+
+
+class StreamingSolver:
+    """Running pattern counts and target scores for one wordle, with early stopping.
+
+    The leader is considered stable once it has stayed the same for patience batches in a row with a delta above
+    the runner up of at least threshold and at least min_tweets tweets seen.
+    """
+
+    def __init__(
+        self,
+        twitter_wordle,
+        wordle_num,
+        min_count=3,
+        penalty_term=-5e7,
+        exclude_misses=False,
+        threshold=1.13,
+        patience=3,
+        min_tweets=100,
+    ):
+        self.score_matrix = twitter_wordle.score_matrix
+        self.wordle_num = wordle_num
+        self.min_count = min_count
+        self.penalty_term = penalty_term
+        self.exclude_misses = exclude_misses
+        self.threshold = threshold
+        self.patience = patience
+        self.min_tweets = min_tweets
+
+        self.counts = np.zeros(NUM_PATTERNS, dtype=np.int64)
+        self.selected = np.zeros(NUM_PATTERNS, dtype=bool)
+        self.scores = np.zeros(len(self.score_matrix))
+        self.tweet_count = 0
+        self.stable_batches = 0
+        self.history = []
+
+    def add_tweets(self, tweets):
+        """Filter and parse a batch of tweet texts like the TwitterWordle constructor, then add_counts."""
+        tweet_text = pd.Series(list(tweets), dtype=object)
+        keep = filter_tweets(tweet_text, np.full(len(tweet_text), self.wordle_num))
+        codes, offsets = parse_score_lines(tweet_text[keep])
+        rows = np.flatnonzero(np.diff(offsets) <= 6)
+        codes, _ = gather_codes(codes, offsets, rows)
+        return self.add_counts(np.bincount(codes, minlength=NUM_PATTERNS), len(rows))
+
+    def add_counts(self, counts, tweet_count=0):
+        """Add a batch of pattern counts and return the current status."""
+        self.counts += drop_solved_lines(counts, self.exclude_misses)
+        self.tweet_count += tweet_count
+        newly_selected = np.flatnonzero((self.counts >= self.min_count) & ~self.selected)
+        if len(newly_selected):
+            self.scores += self.score_matrix.pattern_scores(newly_selected, self.penalty_term)
+            self.selected[newly_selected] = True
+        return self.update_status()
+
+    def update_status(self):
+        status = {
+            'tweets': self.tweet_count,
+            'patterns': int(self.counts.sum()),
+            'selected_patterns': int(self.selected.sum()),
+            'leader': None,
+            'runner_up': None,
+            'sigma': np.nan,
+            'delta': np.nan,
+        }
+        if self.selected.any():
+            res, leader, sigma, delta = summarize_scores(self.scores)
+            top_two = np.argpartition(res, -2)[-2:]
+            status.update(
+                leader=str(self.score_matrix.words[leader]),
+                runner_up=str(self.score_matrix.words[top_two[np.argmin(res[top_two])]]),
+                sigma=sigma,
+                delta=delta,
+            )
+        previous = self.history[-1]['leader'] if self.history else None
+        if (
+            status['leader'] is not None
+            and status['leader'] == previous
+            and status['delta'] >= self.threshold
+            and self.tweet_count >= self.min_tweets
+        ):
+            self.stable_batches += 1
+        else:
+            self.stable_batches = 0
+        status['stable_batches'] = self.stable_batches
+        status['done'] = self.stable_batches >= self.patience
+        self.history.append(status)
+        return status
+
+    @property
+    def status(self):
+        return self.history[-1] if self.history else None
+
+    @property
+    def done(self):
+        return bool(self.history) and self.history[-1]['done']
+
+    def run(self, batches):
+        """add_tweets for each batch until the leader is stable, returns the last status"""
+        for batch in batches:
+            self.add_tweets(batch)
+            if self.done:
+                break
+        return self.status
@@ -5,8 +5,11 @@ import json
 from TwitterWordle import TwitterWordle
 import pandas as pd
 from get_tweets import get_tweets
+from solutions import registry
 import io
+import os
 import datetime
+from tweet_store import import_parquet_files, stored_wordles, write_tweets
 
 
 def today_wordle_num():
@@ -20,7 +23,10 @@ def today_wordle_num():
 if __name__ == '__main__':
     pd.options.plotting.backend = "plotly"
     parser = argparse.ArgumentParser(description='Wordle')
-    parser.add_argument('solution', type=str, help='wordle solution')
+    parser.add_argument('solution',
+                        type=str,
+                        nargs='?',
+                        help='wordle solution, looked up if known')
 
     parser.add_argument('wordle_num', type=int, help='number of wordle')
     parser.add_argument('--no-tweet',
@@ -33,13 +39,19 @@ if __name__ == '__main__':
                         help='use the full 12k word dictionary',
                         default=False)
     args = parser.parse_args()
-    try:
-        df = pd.read_parquet(f"wordle{args.wordle_num}.parquet")
-    except FileNotFoundError:
-        df = get_tweets(args.wordle_num, return_df=True)
-        df.to_parquet(f"wordle{args.wordle_num}.parquet")
+    if args.solution is None:
+        args.solution = registry.word(args.wordle_num)
+        assert args.solution is not None, f"No known solution for Wordle {args.wordle_num}"
+    if args.wordle_num not in stored_wordles():
+        old_cache = f"wordle{args.wordle_num}.parquet"
+        if os.path.exists(old_cache):
+            import_parquet_files([old_cache])
+        else:
+            write_tweets(get_tweets(args.wordle_num, return_df=True))
 
-    t = TwitterWordle(df, use_limited_targets=not args.use_full_dictionary)
+    t = TwitterWordle.from_tweet_store(
+        wordle_nums=[args.wordle_num],
+        use_limited_targets=not args.use_full_dictionary)
     prediction = t.solve(args.wordle_num, mask_result=False, min_count=4)
     if prediction == args.solution:
         emoji = '✅'
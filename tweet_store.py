@@ -0,0 +1,86 @@
+"""Partitioned parquet store of tweets with the score lines already parsed.
+
+    tweet_store/wordle_id=231/part-0.parquet
+
+Next to the tweet text every row keeps `valid` (the TwitterWordle filters: check_match and at most six score
+lines) and `score_codes`, the tweet's score lines as a list of uint8 pattern codes. Loading a day reads only that
+day's partition and only the columns asked for, and nothing is parsed again:
+
+    write_tweets(get_tweets(231, return_df=True))
+    t = TwitterWordle.from_tweet_store(wordle_nums=[231])
+
+Writing a wordle replaces its partition, the other days are untouched.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+from TwitterWordle import filter_tweets, parse_score_lines
+
+STORE_PATH = 'tweet_store'
+
+
+def tweet_table(df):
+    """arrow table of tweet_text, wordle_id, valid and score_codes for a frame of tweet_text and wordle_id"""
+    codes, offsets = parse_score_lines(df['tweet_text'])
+    valid = filter_tweets(df['tweet_text'], df['wordle_id']) & (np.diff(offsets) <= 6)
+    return pa.table(
+        {
+            'tweet_text': pa.array(df['tweet_text'].tolist(), type=pa.string()),
+            'wordle_id': pa.array(df['wordle_id'].to_numpy(), type=pa.int32()),
+            'valid': pa.array(valid),
+            'score_codes': pa.ListArray.from_arrays(
+                pa.array(offsets.astype(np.int32)), pa.array(codes, type=pa.uint8())
+            ),
+        }
+    )
+
+
+def write_tweets(df, path=STORE_PATH):
+    """Parse df once and write it to the store, replacing the partitions of the wordles it holds."""
+    ds.write_dataset(
+        tweet_table(df),
+        path,
+        format='parquet',
+        partitioning=ds.partitioning(pa.schema([('wordle_id', pa.int32())]), flavor='hive'),
+        existing_data_behavior='delete_matching',
+        basename_template='part-{i}.parquet',
+    )
+
+
+def stored_wordles(path=STORE_PATH):
+    """sorted wordle numbers with a partition in the store"""
+    if not os.path.isdir(path):
+        return []
+    return sorted(
+        int(name.split('=', 1)[1]) for name in os.listdir(path) if name.startswith('wordle_id=')
+    )
+
+
+def read_codes(path=STORE_PATH, wordle_nums=None, columns=('tweet_text',)):
+    """(frame of wordle_id and columns, codes, offsets) of the valid tweets, for some wordles or all of them.
+
+    Partitions of other wordles are never opened and only the columns asked for are read.
+    """
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    row_filter = pc.field('valid')
+    if wordle_nums is not None:
+        row_filter = row_filter & pc.field('wordle_id').isin([int(x) for x in wordle_nums])
+    table = dataset.to_table(columns=['wordle_id', *columns, 'score_codes'], filter=row_filter)
+    score_codes = table.column('score_codes').combine_chunks()
+    offsets = np.zeros(len(score_codes) + 1, dtype=np.int64)
+    np.cumsum(pc.list_value_length(score_codes).to_numpy(zero_copy_only=False), out=offsets[1:])
+    codes = score_codes.flatten().to_numpy(zero_copy_only=False).astype(np.uint8)
+    df = table.drop_columns(['score_codes']).to_pandas()
+    df['wordle_id'] = df['wordle_id'].astype(np.int64)
+    return df, codes, offsets
+
+
+def import_parquet_files(paths, path=STORE_PATH):
+    """Move the old per day wordle{N}.parquet caches of tweet_script into the store"""
+    for old_path in paths:
+        write_tweets(pd.read_parquet(old_path), path)
@@ -0,0 +1,110 @@
+"""Check a TwitterWordle prediction against the real solution.
+
+NYTVerifier asks the NY Times wordle endpoint, but keeps every solution it fetches in a local json cache, so a batch
+of solves only goes to the network for wordles it hasn't seen and prefetch can get the rest concurrently. The url is
+a template, so a local stand-in server works too. HashVerifier runs fully offline against the SHA256 hashes in
+hashed_lookup2.json.
+"""
+import datetime
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+NYT_URL = 'https://www.nytimes.com/svc/wordle/v2/{date}.json'
+
+
+def wordle_date(wordle_num):
+    return (datetime.datetime(2021, 6, 19) + datetime.timedelta(days=int(wordle_num))).strftime(
+        '%Y-%m-%d'
+    )
+
+
+class HashVerifier:
+    """Offline check of the prediction's SHA256 against a {wordle_num: hash} dictionary"""
+
+    def __init__(self, hash_dict=None, hash_file='hashed_lookup2.json'):
+        if hash_dict is None:
+            with open(hash_file, 'r') as data_file:
+                hash_dict = json.load(data_file)
+        self.hash_file = hash_file
+        self.hash_dict = hash_dict
+
+    def verify(self, wordle_num, prediction):
+        """(True/False or None if there is no hash for wordle_num, where the answer came from)"""
+        solution_hash = self.hash_dict.get(str(wordle_num))
+        if solution_hash is None:
+            return None, self.hash_file
+        return hashlib.sha256(prediction.encode()).hexdigest() == solution_hash, self.hash_file
+
+    def prefetch(self, wordle_nums):
+        pass
+
+
+class NYTVerifier:
+    """Fetch solutions from the NY Times endpoint, with a persistent local cache.
+
+    If a request fails and a fallback verifier is given (e.g. a HashVerifier), the check goes to the fallback.
+    """
+
+    def __init__(
+        self, cache_path='solution_cache.json', url_template=NYT_URL, fallback=None, timeout=10
+    ):
+        self.cache_path = cache_path
+        self.url_template = url_template
+        self.fallback = fallback
+        self.timeout = timeout
+        self.cache = {}
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, 'r') as f:
+                self.cache = json.load(f)
+
+    def url(self, wordle_num):
+        return self.url_template.format(date=wordle_date(wordle_num), wordle_num=wordle_num)
+
+    def _fetch(self, wordle_num):
+        response = requests.get(self.url(wordle_num), timeout=self.timeout)
+        # an error page is never cached, even if its json happens to hold a solution
+        response.raise_for_status()
+        return str(wordle_num), response.json()['solution']
+
+    def save(self):
+        if self.cache_path:
+            with open(self.cache_path, 'w') as f:
+                json.dump(self.cache, f, indent=4, sort_keys=True)
+
+    def solution(self, wordle_num):
+        key = str(wordle_num)
+        if key not in self.cache:
+            self.cache[key] = self._fetch(wordle_num)[1]
+            self.save()
+        return self.cache[key]
+
+    def prefetch(self, wordle_nums, max_workers=8):
+        """Fetch every uncached solution concurrently and write the cache once."""
+        missing = [x for x in wordle_nums if str(x) not in self.cache]
+        if not missing:
+            return
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(self._try_fetch, missing)
+            self.cache.update(x for x in results if x is not None)
+        self.save()
+
+    def _try_fetch(self, wordle_num):
+        try:
+            return self._fetch(wordle_num)
+        except (requests.RequestException, ValueError, KeyError) as e:
+            print(f'Could not fetch Wordle {wordle_num} solution: {e}')
+            return None
+
+    def verify(self, wordle_num, prediction):
+        """(prediction == solution, where the answer came from)"""
+        try:
+            solution = self.solution(wordle_num)
+        except (requests.RequestException, ValueError, KeyError):
+            if self.fallback is None:
+                raise
+            return self.fallback.verify(wordle_num, prediction)
+        return solution == prediction, self.url(wordle_num)